@@ -23,6 +23,13 @@ class Skills(BaseModel):
     all_education: Optional[List[Education]]
     all_experience: Optional[List[Experience]]
 
+class SectionSkills(BaseModel):
+    section: str = Field(description="The section label exactly as given in the input (e.g. 'experience').")
+    skills: Skills
+
+class ResumeSectionSkills(BaseModel):
+    sections: List[SectionSkills] = Field(description="One entry per labelled section of the input.")
+
 class JobAnalysisResult(BaseModel):
     identified_domain: str = Field(description="The professional domain identified from the resume (e.g., 'Data Scientist').")
     score: int = Field(description="The resume strength score from 0 to 100.")
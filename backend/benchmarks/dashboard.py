@@ -0,0 +1,124 @@
+"""
+Landing page load: the four calls the page made before (/users/me,
+/guidance/active, /career/history, /interview/sessions) against the single
+/users/me/dashboard call, with a simulated Mongo round trip.
+
+Runs the app in-process against an in-memory Mongo (mongomock-motor, see
+requirements-dev.txt). Every single-document call and the first batch of
+every cursor sleeps for the round-trip time, so the figures show how many
+sequential round trips each way of loading the page costs.
+
+Usage: python -m benchmarks.dashboard [runs] [rtt_ms ...]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+import httpx
+import mongomock_motor
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from auth import create_access_token
+from models import (
+    User, UserRoadmap, UserRoadmapStep, InterviewSession, InterviewMessage,
+    ResumeAnalysis, ArchivedAnalysis
+)
+
+SEPARATE_CALLS = ["/users/me", "/guidance/active", "/career/history", "/interview/sessions"]
+DASHBOARD = ["/users/me/dashboard"]
+ROUND_TRIP_METHODS = ("find_one", "count_documents", "insert_one", "update_one", "find_one_and_update")
+CURSOR_CLASSES = (mongomock_motor.AsyncCursor, mongomock_motor.AsyncCommandCursor,
+                  mongomock_motor.AsyncLatentCommandCursor)
+
+# Seconds added to each round trip; changed between runs
+rtt = 0.0
+
+
+def simulate_round_trips():
+    """Patches the mongomock-motor classes so each round trip waits rtt seconds."""
+    def delayed(method):
+        async def wrapper(self, *args, **kwargs):
+            await asyncio.sleep(rtt)
+            return await method(self, *args, **kwargs)
+        return wrapper
+
+    def first_batch_delayed(method):
+        async def wrapper(self, *args, **kwargs):
+            if not self.__dict__.get("_fetched"):
+                self.__dict__["_fetched"] = True
+                await asyncio.sleep(rtt)
+            return await method(self, *args, **kwargs)
+        return wrapper
+
+    for name in ROUND_TRIP_METHODS:
+        setattr(mongomock_motor.AsyncMongoMockCollection, name,
+                delayed(getattr(mongomock_motor.AsyncMongoMockCollection, name)))
+    for cls in CURSOR_CLASSES:
+        cls.to_list = first_batch_delayed(cls.to_list)
+        cls.next = cls.__anext__ = first_batch_delayed(cls.next)
+
+
+async def seed(analyses: int = 8, sessions: int = 8, messages: int = 40) -> User:
+    await init_beanie(
+        database=AsyncMongoMockClient().dashboard_benchmark,
+        document_models=[User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis]
+    )
+    user = User(email="dashboard@example.com", name="Dana", hashed_password="not-used")
+    await user.insert()
+    user_id = str(user.id)
+    for i in range(analyses):
+        await ResumeAnalysis(
+            user_id=user_id,
+            filename=f"resume_v{i}.pdf",
+            analysis_data={"analysis": {"score": 60 + i, "identified_domain": "Data Engineer",
+                                        "missing_skills": ["Spark", "Airflow"], "recommended_courses": ["Kafka 101"]}},
+            resume_text="Built batch and streaming pipelines. " * 100
+        ).insert()
+    for _ in range(sessions):
+        await InterviewSession(
+            user_id=user_id,
+            job_role="Data Engineer",
+            messages=[InterviewMessage(sender="ai" if j % 2 else "user", content="How would you design it? " * 8)
+                      for j in range(messages)]
+        ).insert()
+    await UserRoadmap(
+        user_id=user_id,
+        role="Data Engineer",
+        steps=[UserRoadmapStep(title=f"Step {i}", description="Study and practice. " * 15, estimated_duration="2 weeks",
+                               status=["done", "in_progress", "todo"][min(i // 3, 2)], order_index=i)
+               for i in range(10)]
+    ).insert()
+    return user
+
+
+async def load(client, headers, paths, runs: int) -> dict:
+    body_bytes, started = 0, time.perf_counter()
+    for _ in range(runs):
+        # The page issues its calls concurrently
+        responses = await asyncio.gather(*[client.get(path, headers=headers) for path in paths])
+        assert all(r.status_code == 200 for r in responses)
+        body_bytes = sum(len(r.content) for r in responses)
+    return {"calls": len(paths), "avg_ms": round((time.perf_counter() - started) * 1000 / runs, 1),
+            "body_bytes": body_bytes}
+
+
+async def main(runs: int = 20, *rtts_ms: int):
+    global rtt
+    from main import app
+    user = await seed()
+    simulate_round_trips()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for rtt_ms in rtts_ms or (0, 2, 10):
+            rtt = rtt_ms / 1000
+            print(f"RTT {rtt_ms} ms",
+                  "separate:", await load(client, headers, SEPARATE_CALLS, runs),
+                  "dashboard:", await load(client, headers, DASHBOARD, runs))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
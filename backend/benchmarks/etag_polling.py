@@ -0,0 +1,103 @@
+"""
+Polling load on the ETag endpoints: bytes sent and server CPU per poll, with
+and without If-None-Match.
+
+Runs the app in-process against an in-memory Mongo (mongomock-motor, see
+requirements-dev.txt), so CPU figures include the fake database but the
+comparison between the two modes holds.
+
+Usage: python -m benchmarks.etag_polling [polls] [analyses] [messages]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+import httpx
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from auth import create_access_token
+from models import (
+    User, UserRoadmap, UserRoadmapStep, InterviewSession, InterviewMessage,
+    ResumeAnalysis, ArchivedAnalysis
+)
+
+
+async def seed(analyses: int, messages: int):
+    await init_beanie(
+        database=AsyncMongoMockClient().etag_benchmark,
+        document_models=[User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis]
+    )
+    user = User(email="poller@example.com", hashed_password="not-used")
+    await user.insert()
+    user_id = str(user.id)
+    for i in range(analyses):
+        await ResumeAnalysis(
+            user_id=user_id,
+            filename=f"resume_v{i}.pdf",
+            analysis_data={"analysis": {
+                "score": 60 + i % 40,
+                "identified_domain": "Data Engineer",
+                "missing_skills": ["Spark", "Airflow", "dbt"] * 10,
+                "recommended_courses": ["A course on distributed data processing"] * 10,
+            }},
+            resume_text="Built batch and streaming pipelines. " * 100
+        ).insert()
+    for i in range(5):
+        await InterviewSession(
+            user_id=user_id,
+            job_role="Data Engineer",
+            messages=[InterviewMessage(sender="ai" if j % 2 else "user", content="How would you design it? " * 8)
+                      for j in range(messages)]
+        ).insert()
+    await UserRoadmap(
+        user_id=user_id,
+        role="Data Engineer",
+        steps=[UserRoadmapStep(title=f"Step {i}", description="Study and practice. " * 15,
+                               estimated_duration="2 weeks", order_index=i) for i in range(12)]
+    ).insert()
+    latest = await ResumeAnalysis.find(ResumeAnalysis.user_id == user_id).sort("-created_at").first_or_none()
+    return user, ["/guidance/active", "/career/history", "/interview/sessions", f"/career/analysis/{latest.id}"]
+
+
+async def poll(client, paths, headers, polls: int, conditional: bool) -> dict:
+    etags = {}
+    if conditional:
+        for path in paths:
+            etags[path] = (await client.get(path, headers=headers)).headers["ETag"]
+    sent, statuses = 0, {}
+    cpu_started, started = time.process_time(), time.perf_counter()
+    for _ in range(polls):
+        for path in paths:
+            request_headers = {**headers, "If-None-Match": etags[path]} if conditional else headers
+            response = await client.get(path, headers=request_headers)
+            sent += len(response.content)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    requests = polls * len(paths)
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "body_bytes": sent,
+        "cpu_ms_per_request": round((time.process_time() - cpu_started) * 1000 / requests, 3),
+        "wall_ms_per_request": round((time.perf_counter() - started) * 1000 / requests, 3),
+    }
+
+
+async def main(polls: int = 200, analyses: int = 20, messages: int = 40):
+    from main import app
+    user, paths = await seed(analyses, messages)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        full = await poll(client, paths, headers, polls, conditional=False)
+        revalidated = await poll(client, paths, headers, polls, conditional=True)
+    print("full responses:   ", full)
+    print("If-None-Match 304:", revalidated)
+    print(f"bytes saved: {1 - revalidated['body_bytes'] / full['body_bytes']:.1%}, "
+          f"CPU saved: {1 - revalidated['cpu_ms_per_request'] / full['cpu_ms_per_request']:.1%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:4])))
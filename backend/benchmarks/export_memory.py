@@ -0,0 +1,103 @@
+"""
+Peak memory of a full history export for a synthetic user with 10k interview
+messages, measured as the growth of the process's peak RSS.
+
+Each mode runs in its own process, since peak RSS only ever goes up. The
+database is mongomock-motor (see requirements-dev.txt), which runs in-process
+and materializes find and $unwind results here, work a real Mongo server does
+on its side. The "drain" mode reads the export's session cursors and discards
+them to measure that cost; an export should add little on top of it.
+
+Modes:
+    drain   read the session cursors the export uses, keep nothing
+    ndjson  stream_ndjson
+    zip     stream_zip
+    naive   load every session with to_list(), for comparison
+
+Usage: python -m benchmarks.export_memory <mode> [sessions] [messages_per_session]
+Prints one JSON line with the peak RSS growth in KiB.
+"""
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import history_export
+from models import User, UserRoadmap, InterviewSession, InterviewMessage, ResumeAnalysis, ArchivedAnalysis
+
+
+async def seed(sessions: int, messages: int) -> User:
+    await init_beanie(
+        database=AsyncMongoMockClient().export_benchmark,
+        document_models=[User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis]
+    )
+    user = User(email="exporter@example.com", hashed_password="not-used")
+    await user.insert()
+    for _ in range(sessions):
+        await InterviewSession(
+            user_id=str(user.id),
+            job_role="Data Engineer",
+            # Random text, so a buffered zip does not compress away
+            messages=[InterviewMessage(sender="user", content=os.urandom(100).hex()) for _ in range(messages)]
+        ).insert()
+    return user
+
+
+async def drain(user: User):
+    sessions = InterviewSession.find(InterviewSession.user_id == str(user.id))
+    async for _ in sessions.aggregate([{"$project": {"messages": 0}}]):
+        pass
+    async for _ in sessions.aggregate([{"$project": {"messages": 1}}, {"$unwind": "$messages"}]):
+        pass
+
+
+async def consume(stream):
+    async for _ in stream:
+        pass
+
+
+MODES = {
+    "drain": drain,
+    "ndjson": lambda user: consume(history_export.stream_ndjson(user)),
+    "zip": lambda user: consume(history_export.stream_zip(user)),
+    "naive": lambda user: InterviewSession.find(InterviewSession.user_id == str(user.id)).to_list(),
+}
+
+
+def peak_rss_kib() -> int:
+    # On Linux ru_maxrss carries over from the parent across fork/exec, so a run
+    # started from a bigger process (e.g. pytest) would never see it grow; VmHWM
+    # belongs to this process's own address space
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def main(mode: str, sessions: int = 1000, messages: int = 10):
+    user = await seed(sessions, messages)
+    before, started = peak_rss_kib(), time.perf_counter()
+    await MODES[mode](user)
+    print(json.dumps({
+        "mode": mode,
+        "messages": sessions * messages,
+        "peak_rss_growth_kib": peak_rss_kib() - before,
+        "seconds": round(time.perf_counter() - started, 2),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1], *(int(arg) for arg in sys.argv[2:4])))
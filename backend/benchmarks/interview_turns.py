@@ -0,0 +1,119 @@
+"""
+Mongo round trips and latency per interview turn, before and after the
+session cache.
+
+Each turn stores the candidate's message and the interviewer's reply; the
+model call itself is left out. Modes:
+    save   load the session and save() it back, as the HTTP chat route did
+    push   one $push per message, as the WebSocket did
+    cache  session_cache: in-memory append, batched write-behind $push
+
+The database is mongomock-motor (see requirements-dev.txt), with a simulated
+network round trip added to every find_one, update_one and find_one_and_update
+call. The cache's batches are flushed in the background, so their calls are
+counted but only slow a turn when a flush is still running. Pass a think time
+above INTERVIEW_CACHE_FLUSH_DELAY to see one flush per turn instead of one per
+batch.
+
+Usage: python -m benchmarks.interview_turns [turns] [rtt_ms] [think_ms]
+"""
+import asyncio
+import functools
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+
+from beanie import init_beanie
+from beanie.operators import Push, Inc, Set
+from mongomock_motor import AsyncMongoMockClient
+
+from models import InterviewSession, InterviewMessage
+from session_cache import InterviewSessionCache
+
+# save() goes through find_one_and_update, which also sends the whole document back
+ROUND_TRIP_METHODS = ("find_one", "update_one", "find_one_and_update")
+
+
+def simulate_round_trips(rtt: float) -> dict:
+    """Delays and counts the collection calls each turn makes. Returns the live counters."""
+    calls = {name: 0 for name in ROUND_TRIP_METHODS}
+    collection = InterviewSession.get_motor_collection()
+    for name in ROUND_TRIP_METHODS:
+        method = getattr(collection, name)
+
+        @functools.wraps(method)
+        async def delayed(*args, _method=method, _name=name, **kwargs):
+            calls[_name] += 1
+            await asyncio.sleep(rtt)
+            return await _method(*args, **kwargs)
+
+        setattr(collection, name, delayed)
+    return calls
+
+
+def messages(turn: int):
+    return (InterviewMessage(sender="user", content=f"Answer {turn}: I partitioned the hot tables. " * 4),
+            InterviewMessage(sender="ai", content=f"Question {turn + 1}: how would you backfill it? " * 4))
+
+
+async def turn_save(session_id: str, turn: int):
+    session = await InterviewSession.get(session_id)
+    session.messages.extend(messages(turn))
+    await session.save()
+
+
+async def turn_push(session_id: str, turn: int):
+    session = await InterviewSession.get(session_id)
+    for message in messages(turn):
+        await InterviewSession.find_one(InterviewSession.id == session.id).update(
+            Push({InterviewSession.messages: message}),
+            Inc({InterviewSession.version: 1}),
+            Set({InterviewSession.updated_at: message.timestamp})
+        )
+
+
+async def run(mode: str, turns: int, rtt: float, think: float) -> dict:
+    await init_beanie(database=AsyncMongoMockClient().interview_benchmark, document_models=[InterviewSession])
+    session = InterviewSession(user_id="benchmark", job_role="Data Engineer",
+                               messages=[InterviewMessage(sender="ai", content="Tell me about yourself.")])
+    await session.insert()
+    session_id = str(session.id)
+    calls = simulate_round_trips(rtt)
+    cache = InterviewSessionCache()
+
+    async def turn_cache(session_id: str, turn: int):
+        entry = await cache.get(session_id)
+        async with entry.lock:
+            for message in messages(turn):
+                cache.append(entry, message)
+
+    take_turn = {"save": turn_save, "push": turn_push, "cache": turn_cache}[mode]
+    latencies = []
+    for turn in range(turns):
+        started = time.perf_counter()
+        await take_turn(session_id, turn)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(think)
+    await cache.flush_all()
+
+    stored = await InterviewSession.get_motor_collection().find_one({"_id": session.id})
+    assert len(stored["messages"]) == 1 + 2 * turns
+    latencies.sort()
+    return {
+        "mode": mode,
+        "reads_per_turn": round(calls["find_one"] / turns, 2),
+        "writes_per_turn": round((calls["update_one"] + calls["find_one_and_update"]) / turns, 2),
+        "avg_ms": round(sum(latencies) * 1000 / turns, 2),
+        "p95_ms": round(latencies[int(0.95 * (turns - 1))] * 1000, 2),
+    }
+
+
+async def main(turns: int = 100, rtt_ms: int = 5, think_ms: int = 0):
+    for mode in ("save", "push", "cache"):
+        print(await run(mode, turns, rtt_ms / 1000, think_ms / 1000))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:4])))
@@ -0,0 +1,232 @@
+"""
+Compares the PDF text-extraction backends: time, peak Python memory, text
+yield, and how many resume sections come out intact.
+
+Without arguments the corpus is generated at run time with reportlab (see
+requirements-dev.txt): resume-like PDFs in a single-column layout and in a
+two-column layout with a sidebar, drawn row by row across the columns like
+table-based templates, which is where backends that follow the drawing order
+mix the columns up. Real PDFs can be passed instead; their sections are not
+known, so only time, memory and yield are reported for them.
+
+Usage: python -m benchmarks.pdf_backends [count]
+       python -m benchmarks.pdf_backends <pdf or directory> [...]
+"""
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import List, Optional, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from utils.pdf_handler import BACKENDS, clean_text, _text_chars
+
+FIRST_NAMES = ["Aisha", "Daniel", "Mei", "Rahul", "Sofia", "Tomasz", "Grace", "Kwame"]
+LAST_NAMES = ["Khan", "Okafor", "Lindqvist", "Moreno", "Tanaka", "Novak", "Mensah", "Reyes"]
+ROLES = ["Data Engineer", "Backend Developer", "ML Engineer", "Frontend Developer", "DevOps Engineer"]
+COMPANIES = ["Acme Analytics", "Northwind Labs", "Globex Cloud", "Initech Systems", "Umbrella Health"]
+SKILLS = ["Python", "SQL", "Spark", "Airflow", "Docker", "Kubernetes", "React", "TypeScript", "Go",
+          "PostgreSQL", "Kafka", "Terraform", "AWS", "GCP", "FastAPI", "PyTorch", "dbt", "Redis"]
+ACHIEVEMENTS = [
+    "Cut pipeline runtime by {n}% by partitioning hot tables",
+    "Migrated {n} services to Kubernetes with zero downtime",
+    "Built an event ingestion layer handling {n}k messages/s",
+    "Led a team of {n} engineers through a platform rewrite",
+    "Reduced cloud spend by {n}% with autoscaling policies",
+    "Designed an API used by {n} internal teams",
+]
+DEGREES = ["B.Tech Computer Science", "M.S. Data Science", "B.Sc. Mathematics", "M.Eng. Software Systems"]
+SCHOOLS = ["State University", "Institute of Technology", "City College", "National University"]
+
+# (name, pdf bytes, known sections as lists of lines or None) per file
+Corpus = List[Tuple[str, bytes, Optional[List[List[str]]]]]
+
+
+def _resume(rng: random.Random) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    jobs = []
+    year = 2024
+    for _ in range(rng.randint(3, 5)):
+        start = year - rng.randint(1, 4)
+        jobs.append({
+            "title": f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)}",
+            "dates": f"{start} - {year}",
+            "bullets": [a.format(n=rng.randint(2, 90)) for a in rng.sample(ACHIEVEMENTS, 3)],
+        })
+        year = start
+    return {
+        "name": f"{first} {last}",
+        "contact": [f"{first.lower()}.{last.lower()}@example.com", f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}"],
+        "summary": [f"{rng.choice(ROLES)} with {2024 - year} years of experience",
+                    "building reliable data and backend platforms."],
+        "jobs": jobs,
+        "skills": rng.sample(SKILLS, 8),
+        "education": [rng.choice(DEGREES), rng.choice(SCHOOLS), str(year - rng.randint(0, 2))],
+    }
+
+
+class _Column:
+    """Lays out lines top-down in one column, breaking pages as needed."""
+
+    def __init__(self, x: float, top: float = A4[1] - 60, bottom: float = 60):
+        self.x, self.top, self.bottom = x, top, bottom
+        self.y, self.page = top, 0
+        # (page, -y, x, text, font, size), so sorting gives reading order row by row
+        self.ops = []
+        self.sections: List[List[str]] = [[]]
+
+    def line(self, text: str, font: str = "Helvetica", size: int = 10, gap: float = 14):
+        if self.y < self.bottom:
+            self.page, self.y = self.page + 1, self.top
+        self.ops.append((self.page, -self.y, self.x, text, font, size))
+        self.sections[-1].append(text)
+        self.y -= gap
+
+    def heading(self, text: str):
+        self.y -= 6
+        self.sections.append([])
+        self.line(text.upper(), font="Helvetica-Bold", size=11, gap=16)
+
+
+def _render(*columns: _Column) -> bytes:
+    """Draws the columns row by row, left to right, as table-based resume templates do."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    page = 0
+    for op_page, neg_y, x, text, font, size in sorted(op for column in columns for op in column.ops):
+        while page < op_page:
+            pdf.showPage()
+            page += 1
+        pdf.setFont(font, size)
+        pdf.drawString(x, -neg_y, text)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def single_column_pdf(rng: random.Random) -> Tuple[bytes, List[List[str]]]:
+    resume = _resume(rng)
+    out = _Column(x=60)
+    out.line(resume["name"], font="Helvetica-Bold", size=16, gap=20)
+    out.line(" | ".join(resume["contact"]))
+    out.heading("Summary")
+    for text in resume["summary"]:
+        out.line(text)
+    out.heading("Experience")
+    for job in resume["jobs"]:
+        out.line(job["title"], font="Helvetica-Bold")
+        out.line(job["dates"])
+        for bullet in job["bullets"]:
+            out.line(f"- {bullet}")
+    out.heading("Skills")
+    out.line(", ".join(resume["skills"]))
+    out.heading("Education")
+    for text in resume["education"]:
+        out.line(text)
+    return _render(out), out.sections
+
+
+def two_column_pdf(rng: random.Random) -> Tuple[bytes, List[List[str]]]:
+    """Sidebar with contact, skills and education next to the summary and experience."""
+    resume = _resume(rng)
+    side, main = _Column(x=40), _Column(x=220)
+    side.line(resume["name"], font="Helvetica-Bold", size=14, gap=20)
+    side.heading("Contact")
+    for text in resume["contact"]:
+        side.line(text, size=8)
+    side.heading("Skills")
+    for skill in resume["skills"]:
+        side.line(skill)
+    side.heading("Education")
+    for text in resume["education"]:
+        side.line(text, size=8)
+    main.heading("Summary")
+    for text in resume["summary"]:
+        main.line(text)
+    main.heading("Experience")
+    for job in resume["jobs"]:
+        main.line(job["title"], font="Helvetica-Bold")
+        main.line(job["dates"])
+        for bullet in job["bullets"]:
+            main.line(f"- {bullet}", size=9)
+    return _render(side, main), [section for section in side.sections + main.sections if section]
+
+
+def make_corpus(count: int = 20, seed: int = 0) -> Corpus:
+    """Generates count resume PDFs, alternating single- and two-column layouts."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        layout = single_column_pdf if i % 2 == 0 else two_column_pdf
+        data, sections = layout(rng)
+        corpus.append((f"{layout.__name__.removesuffix('_pdf')}_{i}.pdf", data, sections))
+    return corpus
+
+
+def load_corpus(paths: List[str]) -> Corpus:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.lower().endswith(".pdf")]
+        else:
+            files.append(path)
+    corpus = []
+    for path in files:
+        with open(path, "rb") as file:
+            corpus.append((path, file.read(), None))
+    return corpus
+
+
+def _sections_intact(text: str, sections: List[List[str]]) -> int:
+    """Sections whose lines come out together and in order, not interleaved with another column."""
+    flat = clean_text(text)
+    return sum(1 for lines in sections if clean_text(" ".join(lines)) in flat)
+
+
+def benchmark(corpus: Corpus, backends=None) -> dict:
+    """
+    Runs each backend over the corpus.
+    Args:
+        corpus (list): (name, pdf bytes, known sections or None) per file.
+        backends (list): Backend names to compare, defaults to all available.
+    """
+    names = backends or [name for name, backend in BACKENDS.items() if backend.available()]
+    results = {}
+    for name in names:
+        backend = BACKENDS[name]
+        total_time, peak, chars, failures, intact, known = 0.0, 0, 0, 0, 0, 0
+        for _, data, sections in corpus:
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                text = backend.extract(data)
+            except Exception:
+                failures += 1
+                text = ""
+            total_time += time.perf_counter() - started
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            chars += _text_chars(text)
+            if sections:
+                intact += _sections_intact(text, sections)
+                known += len(sections)
+        results[name] = {
+            "files": len(corpus),
+            "total_ms": round(total_time * 1000, 1),
+            "avg_ms": round(total_time * 1000 / max(len(corpus), 1), 1),
+            "peak_kb": round(peak / 1024, 1),
+            "text_chars": chars,
+            "sections_intact": f"{intact / known:.1%}" if known else None,
+            "failures": failures,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    corpus = make_corpus(int(args[0])) if not args or args[0].isdigit() else load_corpus(args)
+    for name, result in benchmark(corpus).items():
+        print(name, result)
@@ -10,7 +10,7 @@ MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 async def init_db():
     client = AsyncIOMotorClient(MONGODB_URI)
     # Import models here to avoid circular imports during startup
-    from models import User, UserRoadmap, InterviewSession, ResumeAnalysis, UserRoadmapStep
+    from models import User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis, UserRoadmapStep
     
     # Note: UserRoadmapStep is a Pydantic model (embedded), not a Document, so it doesn't need to be in document_models list unless it's a root Document.
     # checking models.py... UserRoadmapStep is BaseModel now, so good.
@@ -21,7 +21,8 @@ async def init_db():
             User,
             UserRoadmap,
             InterviewSession,
-            ResumeAnalysis
+            ResumeAnalysis,
+            ArchivedAnalysis
         ]
     )
 
@@ -1,11 +1,14 @@
 import os
 import json
-from typing import Optional, List, Dict
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Optional, List, Dict, Union
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
-from ai_schema.schema import CareerRoadmap
+from ai_schema.schema import CareerRoadmap, RoadmapStep
 from pydantic import BaseModel, Field
+from utils.circuit_breaker import CircuitBreaker, CircuitOpen
 
 load_dotenv()
 
@@ -18,6 +21,25 @@ llm = ChatGoogleGenerativeAI(
     temperature=0.7 
 )
 
+guidance_breaker = CircuitBreaker("guidance_agent")
+
+# Last generated roadmap per role, served while the model is unavailable
+ROADMAP_CACHE_SIZE = int(os.getenv("ROADMAP_CACHE_SIZE", "200"))
+_roadmap_cache: "OrderedDict[str, CareerRoadmap]" = OrderedDict()
+_roadmap_cache_lock = threading.Lock()
+
+def _remember_roadmap(job_role: str, roadmap: CareerRoadmap):
+    with _roadmap_cache_lock:
+        key = job_role.strip().lower()
+        _roadmap_cache[key] = roadmap
+        _roadmap_cache.move_to_end(key)
+        while len(_roadmap_cache) > ROADMAP_CACHE_SIZE:
+            _roadmap_cache.popitem(last=False)
+
+def cached_roadmap(job_role: str) -> Optional[CareerRoadmap]:
+    with _roadmap_cache_lock:
+        return _roadmap_cache.get(job_role.strip().lower())
+
 class QuizQuestion(BaseModel):
     question: str
     options: List[str]
@@ -26,26 +48,82 @@ class QuizQuestion(BaseModel):
 class Quiz(BaseModel):
     questions: List[QuizQuestion]
 
+roadmap_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system",
+         "You are an expert Career Counselor. Your task is to accept a job role and create a detailed, step-by-step learning roadmap for a beginner to master that role. "
+         "Break it down into logical steps (e.g., Basics, Intermediate, Advanced). Provide only title, description, and time estimates."),
+        ("user", "Create a career roadmap for: {job_role}")
+    ]
+)
+
 def generate_roadmap(job_role: str) -> Optional[CareerRoadmap]:
-    """Generates a career roadmap for a specific job role."""
+    """
+    Generates a career roadmap for a specific job role.
+    Falls back to the last roadmap generated for the role if the model call fails.
+    Raises:
+        CircuitOpen: If the model is unavailable and no roadmap is cached.
+    """
     structured_llm = llm.with_structured_output(CareerRoadmap)
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system",
-             "You are an expert Career Counselor. Your task is to accept a job role and create a detailed, step-by-step learning roadmap for a beginner to master that role. "
-             "Break it down into logical steps (e.g., Basics, Intermediate, Advanced). Provide only title, description, and time estimates."),
-            ("user", "Create a career roadmap for: {job_role}")
-        ]
-    )
-    chain = prompt | structured_llm
+    chain = roadmap_prompt | structured_llm
     try:
         print(f"---Generating Roadmap for {job_role}---")
-        result = chain.invoke({"job_role": job_role})
+        result = guidance_breaker.call(chain.invoke, {"job_role": job_role})
+        if result:
+            _remember_roadmap(job_role, result)
         return result
     except Exception as e:
         print(f"Error generating roadmap: {e}")
+        cached = cached_roadmap(job_role)
+        if cached:
+            print(f"---Serving cached roadmap for {job_role}---")
+            return cached
+        if isinstance(e, CircuitOpen):
+            raise
         return None
 
+async def stream_roadmap(job_role: str) -> AsyncIterator[Union[RoadmapStep, CareerRoadmap]]:
+    """
+    Streams a career roadmap for a job role. Yields each RoadmapStep as soon as the
+    model has finished writing it, then the validated CareerRoadmap.
+    Falls back to the last roadmap generated for the role if the model call fails,
+    like generate_roadmap. If steps were already sent, only the cached roadmap
+    follows and replaces them.
+    Raises:
+        CircuitOpen: If the model is unavailable and no roadmap is cached.
+        Exception: The model's error, if it failed and no roadmap is cached.
+    """
+    # Same schema as generate_roadmap, parsed as partial JSON while it streams
+    json_llm = llm.with_structured_output(CareerRoadmap.model_json_schema())
+    chain = roadmap_prompt | json_llm
+    print(f"---Streaming Roadmap for {job_role}---")
+    emitted = 0
+    partial = {}
+    try:
+        with guidance_breaker.guard():
+            async for partial in chain.astream({"job_role": job_role}):
+                steps = partial.get("steps") or []
+                # A step is complete once the model has started writing the next one
+                while emitted < len(steps) - 1:
+                    yield RoadmapStep.model_validate(steps[emitted])
+                    emitted += 1
+            roadmap = CareerRoadmap.model_validate(partial)
+    except Exception as e:
+        print(f"Error generating roadmap: {e}")
+        roadmap = cached_roadmap(job_role)
+        if not roadmap:
+            raise
+        print(f"---Serving cached roadmap for {job_role}---")
+        if emitted:
+            # The steps sent so far came from the failed call, not from this roadmap
+            yield roadmap
+            return
+    else:
+        _remember_roadmap(job_role, roadmap)
+    for step in roadmap.steps[emitted:]:
+        yield step
+    yield roadmap
+
 def get_topic_details(topic: str, role: str) -> str:
     """Generates a detailed explanation for a specific topic."""
     prompt = ChatPromptTemplate.from_messages(
@@ -58,8 +136,10 @@ def get_topic_details(topic: str, role: str) -> str:
     )
     chain = prompt | llm
     try:
-        result = chain.invoke({"topic": topic, "role": role})
+        result = guidance_breaker.call(chain.invoke, {"topic": topic, "role": role})
         return result.content
+    except CircuitOpen:
+        raise
     except Exception as e:
         print(f"Error generating details: {e}")
         return "Failed to retrieve details."
@@ -77,9 +157,11 @@ def generate_quiz(topic: str) -> List[Dict]:
     )
     chain = prompt | structured_llm
     try:
-        result = chain.invoke({"topic": topic})
+        result = guidance_breaker.call(chain.invoke, {"topic": topic})
         # Convert Pydantic model to simple dict list
         return [q.dict() for q in result.questions]
+    except CircuitOpen:
+        raise
     except Exception as e:
         print(f"Error generating quiz: {e}")
         return []
@@ -0,0 +1,154 @@
+import io
+import json
+import zipfile
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from models import User, ResumeAnalysis, ArchivedAnalysis, UserRoadmap, InterviewSession
+from retention import decompress_analysis
+from session_cache import session_cache
+
+# Cursor batch size; bounds how many documents are held in memory at once
+CURSOR_BATCH_SIZE = 100
+
+# Zip entry for each record type
+ZIP_ENTRIES = {
+    "user": "profile.ndjson",
+    "resume_analysis": "resume_analyses.ndjson",
+    "roadmap": "roadmaps.ndjson",
+    "interview_session": "interview_sessions.ndjson",
+    "interview_message": "interview_messages.ndjson",
+}
+
+
+async def iter_user_records(user: User) -> AsyncIterator[dict]:
+    """
+    Yields a user's full history one record at a time, grouped by type.
+    Interview messages are unwound server-side so a long session is never
+    loaded as a single document.
+    """
+    user_id = str(user.id)
+    # Include interview messages still waiting to be written behind
+    await session_cache.flush_user(user_id)
+    yield {"type": "user", "id": user_id, "email": user.email, "name": user.name}
+
+    async for item in ResumeAnalysis.find(ResumeAnalysis.user_id == user_id, batch_size=CURSOR_BATCH_SIZE):
+        yield {
+            "type": "resume_analysis",
+            "id": str(item.id),
+            "filename": item.filename,
+            "created_at": item.created_at,
+            "analysis_data": item.analysis_data,
+        }
+    async for item in ArchivedAnalysis.find(ArchivedAnalysis.user_id == user_id, batch_size=CURSOR_BATCH_SIZE):
+        data = decompress_analysis(item)
+        yield {
+            "type": "resume_analysis",
+            "id": item.analysis_id,
+            "filename": item.filename,
+            "created_at": item.created_at,
+            "analysis_data": data.get("analysis_data"),
+            "archived": True,
+        }
+
+    async for item in UserRoadmap.find(UserRoadmap.user_id == user_id, batch_size=CURSOR_BATCH_SIZE):
+        yield {
+            "type": "roadmap",
+            "id": str(item.id),
+            "role": item.role,
+            "created_at": item.created_at,
+            "is_active": item.is_active,
+            "steps": [step.dict() for step in item.steps],
+        }
+
+    sessions = InterviewSession.find(InterviewSession.user_id == user_id)
+    async for item in sessions.aggregate([{"$project": {"messages": 0}}], batchSize=CURSOR_BATCH_SIZE):
+        yield {
+            "type": "interview_session",
+            "id": str(item["_id"]),
+            "job_role": item["job_role"],
+            "created_at": item.get("created_at"),
+            "is_active": item.get("is_active"),
+        }
+    async for item in sessions.aggregate([
+        {"$project": {"messages": 1}},
+        {"$unwind": "$messages"},
+    ], batchSize=CURSOR_BATCH_SIZE):
+        message = item["messages"]
+        yield {
+            "type": "interview_message",
+            "session_id": str(item["_id"]),
+            "sender": message["sender"],
+            "content": message["content"],
+            "timestamp": message.get("timestamp"),
+        }
+
+
+def _ndjson_line(record: dict) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+
+async def stream_ndjson(user: User) -> AsyncIterator[bytes]:
+    async for record in iter_user_records(user):
+        yield _ndjson_line(record)
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands zip output back to the generator chunk by chunk."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(user: User) -> AsyncIterator[bytes]:
+    """Streams a zip with one NDJSON file per record type, without buffering the archive."""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        current_type, entry = None, None
+        try:
+            async for record in iter_user_records(user):
+                if record["type"] != current_type:
+                    if entry:
+                        entry.close()
+                    current_type = record["type"]
+                    entry = archive.open(ZIP_ENTRIES[current_type], mode="w")
+                entry.write(_ndjson_line(record))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            # Closing the archive with an entry still open raises and would hide the original error
+            if entry:
+                entry.close()
+    yield sink.drain()
+
+
+def export_response(user: User, format: str) -> StreamingResponse:
+    """Builds the streaming download of a user's history as NDJSON or zip."""
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(user),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="export_{user.id}.ndjson"'}
+        )
+    if format == "zip":
+        return StreamingResponse(
+            stream_zip(user),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="export_{user.id}.zip"'}
+        )
+    raise HTTPException(status_code=400, detail="Format must be 'ndjson' or 'zip'.")
@@ -1,9 +1,10 @@
 import os
 import getpass
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from utils.circuit_breaker import CircuitBreaker
 
 load_dotenv()
 
@@ -17,15 +18,12 @@ llm = ChatGoogleGenerativeAI(
     temperature=0.7 # Slight creativity for conversation
 )
 
-def generate_interview_response(job_role: str, history: List[Dict[str, str]]) -> str:
-    """
-    Generates the next response from the AI interviewer.
-    
-    Args:
-        job_role: The role the user is interviewing for.
-        history: A list of message dictionaries with 'sender' ('user' or 'ai') and 'content'.
-    """
-    
+# While open, the interviewer answers with FALLBACK_RESPONSE without calling the model
+interview_breaker = CircuitBreaker("interview_agent")
+
+FALLBACK_RESPONSE = "I apologize, but I'm having trouble connecting to the server. Let's pause for a moment."
+
+def _build_messages(job_role: str, history: List[Dict[str, str]]) -> list:
     system_prompt = (
         f"You are an experienced technical interviewer conducting a mock interview for a '{job_role}' position. "
         "Your goal is to assess the candidate's skills, experience, and cultural fit. "
@@ -44,10 +42,39 @@ def generate_interview_response(job_role: str, history: List[Dict[str, str]]) ->
             messages.append(HumanMessage(content=msg['content']))
         elif msg['sender'] == 'ai':
             messages.append(AIMessage(content=msg['content']))
-            
+    return messages
+
+def generate_interview_response(job_role: str, history: List[Dict[str, str]]) -> str:
+    """
+    Generates the next response from the AI interviewer.
+    
+    Args:
+        job_role: The role the user is interviewing for.
+        history: A list of message dictionaries with 'sender' ('user' or 'ai') and 'content'.
+    """
+    messages = _build_messages(job_role, history)
     try:
-        response = llm.invoke(messages)
+        response = interview_breaker.call(llm.invoke, messages)
         return response.content
     except Exception as e:
         print(f"Error generating interview response: {e}")
-        return "I apologize, but I'm having trouble connecting to the server. Let's pause for a moment."
+        return FALLBACK_RESPONSE
+
+async def stream_interview_response(job_role: str, history: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """
+    Streams the next response from the AI interviewer chunk by chunk.
+    Yields the fallback message if the model call fails before any output.
+    """
+    messages = _build_messages(job_role, history)
+    produced = False
+    try:
+        with interview_breaker.guard():
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    produced = True
+                    yield chunk.content
+    except Exception as e:
+        print(f"Error streaming interview response: {e}")
+        if not produced:
+            yield FALLBACK_RESPONSE
+
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,14 +8,25 @@ from routes.users.user_routes import router as users_router
 from routes.common.common_routes import router as common_router
 from routes.career.interview_routes import router as interview_router
 from routes.career.guidance_routes import router as guidance_router
+from routes.admin.admin_routes import router as admin_router
 from database import init_db
+from session_cache import session_cache
+from retention import retention_loop
+from profiling import ProfilingMiddleware
+from utils.circuit_breaker import CircuitOpen, circuit_open_handler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    retention_task = asyncio.create_task(retention_loop())
     yield
+    retention_task.cancel()
+    # Write behind any interview messages still buffered in memory
+    await session_cache.flush_all()
 
 app = FastAPI(lifespan=lifespan)
+# Routes whose model call was rejected by an open circuit answer 503 at once
+app.add_exception_handler(CircuitOpen, circuit_open_handler)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,10 +37,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Samples a share of requests, or any request an admin flags with X-Profile
+app.add_middleware(ProfilingMiddleware)
 
 # Include the route routers
 app.include_router(career_router, prefix="/career", tags=["career"])
 app.include_router(users_router, prefix="/users", tags=["users"])
 app.include_router(interview_router, prefix="/interview", tags=["interview"])
 app.include_router(guidance_router, prefix="/guidance", tags=["guidance"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
 app.include_router(common_router, tags=["common"])
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import Optional, List
-from beanie import Document, Indexed
+from pymongo import ASCENDING, IndexModel
+from beanie import Document, Indexed, PydanticObjectId, before_event, Replace, Save, SaveChanges
 from pydantic import BaseModel, Field, validator
 import re
 from datetime import datetime
@@ -57,31 +58,114 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+# Versioned documents
+class VersionedDocument(Document):
+    """Document carrying a version counter that is bumped on every write.
+
+    Used to derive ETags for read-heavy endpoints. Query-level updates
+    (``find(...).update``) bypass these hooks and must ``Inc`` the version
+    themselves.
+    """
+    version: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @before_event(Replace, Save, SaveChanges)
+    def bump_version(self):
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+
+class DocumentVersion(BaseModel):
+    """Projection used to check ETags without loading the full document."""
+    id: PydanticObjectId = Field(alias="_id")
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
 # Resume Analysis Models
-class ResumeAnalysis(Document):
+class ResumeSection(BaseModel):
+    name: str
+    hash: str
+    extraction: Optional[dict] = None # Skills dict extracted from this section
+
+class ResumeAnalysis(VersionedDocument):
     user_id: Indexed(str) # type: ignore
     filename: str
     analysis_data: dict
+    resume_text: Optional[str] = None
+    sections: List[ResumeSection] = []
+    prompt_stats: Optional[dict] = None # estimated prompt tokens sent vs. saved by compaction
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "resume_analyses"
 
+class ArchivedAnalysis(Document):
+    """Cold copy of an old ResumeAnalysis, stored as zlib-compressed JSON."""
+    user_id: Indexed(str) # type: ignore
+    analysis_id: Indexed(str) # type: ignore
+    filename: str
+    created_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    # Kept uncompressed so history lists do not have to inflate the payload
+    score: Optional[int] = None
+    domain: Optional[str] = None
+    payload: bytes
+
+    class Settings:
+        name = "resume_analyses_archive"
+
+class ArchivedSummaryView(BaseModel):
+    """Projection of an archived analysis without its compressed payload."""
+    analysis_id: str
+    filename: str
+    created_at: datetime
+    score: Optional[int] = None
+    domain: Optional[str] = None
+
+class ResumeSectionsView(BaseModel):
+    """Projection of the stored section extractions of an analysis."""
+    sections: List[ResumeSection] = []
+
+class AnalysisSummaryView(BaseModel):
+    """Projection of an analysis with only the fields shown in lists."""
+    id: PydanticObjectId = Field(alias="_id")
+    filename: str
+    created_at: datetime
+    analysis_data: dict = {}
+
+    class Settings:
+        projection = {
+            "filename": 1,
+            "created_at": 1,
+            "analysis_data.analysis.score": 1,
+            "analysis_data.analysis.identified_domain": 1,
+        }
+
 # Interview Models
 class InterviewMessage(BaseModel):
     sender: str  # "user" or "ai"
     content: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
-class InterviewSession(Document):
+class InterviewSession(VersionedDocument):
     user_id: Indexed(str) # type: ignore
     job_role: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = Field(default=True)
     messages: List[InterviewMessage] = []
+    expires_at: Optional[datetime] = None # set by retention once abandoned; removed by the TTL index
 
     class Settings:
         name = "interview_sessions"
+        indexes = [
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        ]
+
+class SessionSummaryView(BaseModel):
+    """Projection of a session without its messages."""
+    id: PydanticObjectId = Field(alias="_id")
+    job_role: str
+    created_at: datetime
+    is_active: bool = True
 
 # Career Roadmap Models
 class UserRoadmapStep(BaseModel):
@@ -92,7 +176,7 @@ class UserRoadmapStep(BaseModel):
     status: str = "todo" # todo, in_progress, done
     order_index: int
 
-class UserRoadmap(Document):
+class UserRoadmap(VersionedDocument):
     user_id: Indexed(str) # type: ignore
     role: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -102,3 +186,14 @@ class UserRoadmap(Document):
     class Settings:
         name = "user_roadmaps"
 
+class StepStatusView(BaseModel):
+    status: str = "todo"
+
+class RoadmapProgressView(BaseModel):
+    """Projection of a roadmap with only step statuses, for progress counts."""
+    id: PydanticObjectId = Field(alias="_id")
+    role: str
+    steps: List[StepStatusView] = []
+
+    class Settings:
+        projection = {"role": 1, "steps.status": 1}
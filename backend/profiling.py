@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from auth import is_admin_token
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+# Share of requests profiled at random (0 disables sampling); admins can force a
+# profile on any request by sending "X-Profile: 1" with their X-Admin-Token
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Sampling interval of the profiler in seconds
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+# Number of profiles kept in memory for the admin endpoint
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+# Optional directory where every profile is also written as a speedscope file
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+
+class ProfileStore:
+    """Bounded ring buffer of recent profiles, optionally mirrored to PROFILE_DIR."""
+
+    def __init__(self, size: int = PROFILE_BUFFER_SIZE, directory: Optional[str] = PROFILE_DIR):
+        self._profiles: Deque[dict] = deque(maxlen=size)
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add(self, summary: dict, data: str):
+        self._profiles.append({**summary, "data": data})
+
+    def write(self, profile_id: str, data: str):
+        path = os.path.join(self.directory, f"{profile_id}.speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+    def list(self) -> List[dict]:
+        """Summaries of the buffered profiles, newest first."""
+        return [{k: v for k, v in p.items() if k != "data"} for p in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """Speedscope document of a profile, from the buffer or PROFILE_DIR."""
+        for profile in self._profiles:
+            if profile["id"] == profile_id:
+                return json.loads(profile["data"])
+        if self.directory and profile_id.isalnum():
+            path = os.path.join(self.directory, f"{profile_id}.speedscope.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)
+        return None
+
+
+profile_store = ProfileStore()
+
+
+def _profile_requested(scope) -> bool:
+    wanted, token = False, None
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            wanted = value not in (b"", b"0")
+        elif name == b"x-admin-token":
+            token = value.decode("latin-1")
+    return wanted and is_admin_token(token)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs a sampling profiler over selected HTTP requests and
+    stores a speedscope (flame graph) profile of each. Unselected requests only
+    pay for a random draw and a scan of the request headers.
+
+    The profiler follows the request's own task, so concurrent requests do not
+    show up in its profile. Work handed to asyncio.to_thread (PDF parsing, LLM
+    calls) appears as time spent awaiting on the calling line.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.store = store
+        if Profiler is None:
+            print("pyinstrument is not installed; request profiling is disabled")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or Profiler is None:
+            return await self.app(scope, receive, send)
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and not _profile_requested(scope):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+        status = {"code": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "sampled": sampled,
+            }
+            try:
+                # Rendering and writing to disk are kept off the event loop
+                data = await asyncio.to_thread(profiler.output, SpeedscopeRenderer())
+                self.store.add(summary, data)
+                if self.store.directory:
+                    await asyncio.to_thread(self.store.write, profile_id, data)
+            except Exception as e:
+                print(f"Error storing profile {profile_id}: {e}")
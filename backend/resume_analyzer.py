@@ -1,16 +1,25 @@
 import getpass
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from typing import TypedDict
 
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langgraph.constants import END
 from langgraph.graph import StateGraph
+from langgraph.types import RetryPolicy
 
 # Assuming these are correct from your local files
 from ai_schema.schema import *
 from utils.pdf_handler import read_pdf, clean_text
+from utils.resume_sections import compact_resume, estimate_tokens, section_hash, diff_sections
+from utils.circuit_breaker import CircuitBreaker, CircuitOpen
 
 load_dotenv()
 
@@ -24,12 +33,43 @@ llm = ChatGoogleGenerativeAI(
     google_api_key=os.environ["GOOGLE_API_KEY"]
 )
 
+# While open, runs stop at their last checkpoint without calling the model and can be resumed later
+resume_breaker = CircuitBreaker("resume_analyzer")
+
+# Where graph checkpoints are kept: "memory" (per process) or "mongodb"
+GRAPH_CHECKPOINTER = os.getenv("GRAPH_CHECKPOINTER", "memory")
+# Attempts per LLM node before the run is left resumable at its last checkpoint
+NODE_MAX_ATTEMPTS = int(os.getenv("GRAPH_NODE_MAX_ATTEMPTS", "3"))
+# Checkpoints of a failed run are kept this many seconds for it to be resumed...
+FAILED_RUN_TTL = float(os.getenv("GRAPH_FAILED_RUN_TTL", "86400"))
+# ...and for at most this many failed runs, oldest deleted first
+MAX_FAILED_RUNS = int(os.getenv("GRAPH_MAX_FAILED_RUNS", "500"))
+
+NODES = ["reader", "ai_extractor", "analyzer"]
+
+
+class StepFailed(Exception):
+    """Raised by a node whose LLM step failed, so the node is retried and the run stops at the last good checkpoint."""
+
+
+class AnalysisRunFailed(Exception):
+    def __init__(self, run_id: str, error: Exception):
+        super().__init__(f"Resume analysis run {run_id} failed: {error}")
+        self.run_id = run_id
+        self.error = error
+
 
 # Define the state for the graph
 class GraphState(TypedDict):
     """Represents the state of our graph."""
     file_name: str
+    raw_text: str | None
     resume_text: str | None
+    prompt_text: str | None
+    prompt_stats: dict | None
+    sections: dict | None
+    previous_sections: dict | None
+    section_results: dict | None
     extracted_skills: Skills | None
     analysis_result: JobAnalysisResult | None
 
@@ -37,51 +77,140 @@ class GraphState(TypedDict):
 def reading_agent(state: GraphState) -> GraphState:
     """Reads a PDF file and cleans the text."""
     print("---Reading PDF---")
-    file_name = state["file_name"]
-    pdf = read_pdf(file_name)
+    if state.get("raw_text"):
+        # Text already extracted by the caller
+        pdf = {"status": True, "text": state["raw_text"]}
+    else:
+        pdf = read_pdf(state["file_name"])
     if pdf["status"]:
         cleaned_text = clean_text(pdf["text"])
+        sections, prompt_text = compact_resume(pdf["text"])
         state["resume_text"] = cleaned_text
+        state["sections"] = sections
+        state["prompt_text"] = prompt_text
+        # Before compaction the full cleaned text went to both LLM calls
+        state["prompt_stats"] = {
+            "original_tokens": estimate_tokens(cleaned_text),
+            "compacted_tokens": estimate_tokens(prompt_text),
+            "baseline_prompt_tokens": 2 * estimate_tokens(cleaned_text),
+            "prompt_tokens": estimate_tokens(prompt_text),
+        }
     else:
-        print(f"Error reading PDF: {pdf.get('error')}")
+        print(f"Error reading PDF: {pdf.get('text')}")
         state["resume_text"] = None
+        state["sections"] = None
+        state["prompt_text"] = None
+        state["prompt_stats"] = None
     return state
 
 
+def merge_extractions(extractions):
+    """Merges per-section Skills dicts into one, dropping duplicate skills and contacts."""
+    merged = {"all_skills": [], "all_contacts": [], "all_education": [], "all_experience": []}
+    seen_skills, seen_contacts = set(), set()
+    for extraction in extractions:
+        for skill in extraction.get("all_skills") or []:
+            key = skill["skill_name"].strip().lower()
+            if key not in seen_skills:
+                seen_skills.add(key)
+                merged["all_skills"].append(skill)
+        for contact in extraction.get("all_contacts") or []:
+            key = contact["contact"].strip().lower()
+            if key not in seen_contacts:
+                seen_contacts.add(key)
+                merged["all_contacts"].append(contact)
+        merged["all_education"].extend(extraction.get("all_education") or [])
+        merged["all_experience"].extend(extraction.get("all_experience") or [])
+    return merged
+
+
+def label_sections(names, sections):
+    """Joins sections into one prompt, each under a label the model echoes back."""
+    return "\n\n".join(f"=== {name} ===\n{sections[name]}" for name in names)
+
+
+def split_extraction(output, names):
+    """Maps a ResumeSectionSkills result back to section names; sections the model skipped map to None."""
+    wanted = {name.lower(): name for name in names}
+    found = {}
+    for entry in output.sections if output else []:
+        name = wanted.get(entry.section.strip().strip("=").strip().lower())
+        if name is not None:
+            found.setdefault(name, []).append(entry.skills.model_dump())
+    return {name: merge_extractions(found[name]) if name in found else None for name in names}
+
+
 def ai_skill_extract(state: GraphState) -> GraphState:
-    """Uses an LLM to extract skills from the resume text."""
-    print("---Extracting Skills---")
+    """Uses an LLM to extract skills from the resume text, section by section.
+
+    Sections whose text is unchanged since the user's previous upload reuse the
+    stored extraction. Changed sections are sent together in a single LLM call,
+    each under its own label, and the result is split back per section.
+    """
     resume_text = state["resume_text"]
+    sections = state.get("sections") or {}
 
-    if not resume_text:
+    if not resume_text or not sections:
         print("No resume text to process.")
         state["extracted_skills"] = None
+        state["section_results"] = None
         return state
 
-    structured_llm = llm.with_structured_output(Skills)
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system",
-             "You are a HR assistant. Your task is to summarize the resume and extract important skills from the text. Respond with a JSON object containing the skills."),
-            ("user", "Summarize and extract skills from this resume: {resume_text}")
-        ]
-    )
-    chain = prompt | structured_llm
+    previous = state.get("previous_sections") or {}
+    changed, unchanged = diff_sections(sections, previous)
+    print(f"---Extracting Skills ({len(changed)} changed, {len(unchanged)} reused sections)---")
 
-    try:
-        skills = chain.invoke({"resume_text": resume_text})
-        state["extracted_skills"] = skills
-    except Exception as e:
-        print(f"Error invoking LLM chain: {e}")
-        state["extracted_skills"] = None
+    results = {name: {"hash": previous[name]["hash"], "extraction": previous[name]["extraction"]} for name in unchanged}
+
+    if changed:
+        structured_llm = llm.with_structured_output(ResumeSectionSkills)
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system",
+                 "You are a HR assistant. Your task is to summarize the resume and extract important skills from the text. "
+                 "The resume is split into sections, each starting with a line '=== <section> ==='. "
+                 "Respond with a JSON object holding one entry per section, using the section label exactly as given, with the skills extracted from that section."),
+                ("user", "Summarize and extract skills from these resume sections:\n\n{resume_text}")
+            ]
+        )
+        chain = prompt | structured_llm
+
+        try:
+            output = resume_breaker.call(chain.invoke, {"resume_text": label_sections(changed, sections)})
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            print(f"Error invoking LLM chain: {e}")
+            raise StepFailed(str(e)) from e
+
+        extractions = split_extraction(output, changed)
+        for name in changed:
+            if extractions[name] is None:
+                print(f"No extraction returned for section '{name}'")
+            results[name] = {"hash": section_hash(sections[name]), "extraction": extractions[name]}
 
+        if all(results[name]["extraction"] is None for name in changed) and not unchanged:
+            raise StepFailed("Skill extraction returned no section")
+
+        if state.get("prompt_stats"):
+            # Copy rather than mutate: the input state is reused if this node is retried
+            stats = state["prompt_stats"]
+            state["prompt_stats"] = {
+                **stats,
+                "prompt_tokens": stats["prompt_tokens"] + sum(estimate_tokens(sections[name]) for name in changed)
+            }
+
+    results = {name: results[name] for name in sections}
+    extractions = [r["extraction"] for r in results.values() if r["extraction"] is not None]
+    state["section_results"] = results
+    state["extracted_skills"] = Skills(**merge_extractions(extractions)) if extractions else None
     return state
 
 
 def find_and_analyze(state: GraphState) -> GraphState:
     """Identifies domain and performs gap analysis."""
     print("---Analyzing Gaps & Score---")
-    resume_text = state["resume_text"]
+    resume_text = state.get("prompt_text") or state["resume_text"]
     skills = state["extracted_skills"]
     
     if not resume_text:
@@ -104,28 +233,55 @@ def find_and_analyze(state: GraphState) -> GraphState:
     chain = prompt | structured_llm
     
     try:
-        result = chain.invoke({"resume_text": resume_text, "skills": skills})
+        result = resume_breaker.call(chain.invoke, {"resume_text": resume_text, "skills": skills})
         state["analysis_result"] = result
+    except CircuitOpen:
+        raise
     except Exception as e:
         print(f"Error in analysis: {e}")
-        state["analysis_result"] = None
+        raise StepFailed(str(e)) from e
         
     return state
 
 
+def _make_checkpointer():
+    # Our structured-output models are stored in checkpoints; register them so
+    # they are restored without the "unregistered type" warning
+    serde = JsonPlusSerializer(allowed_msgpack_modules=[
+        ("ai_schema.schema", "Skills"),
+        ("ai_schema.schema", "JobAnalysisResult"),
+    ])
+    if GRAPH_CHECKPOINTER == "mongodb":
+        try:
+            from langgraph.checkpoint.mongodb import MongoDBSaver
+            from pymongo import MongoClient
+            client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+            return MongoDBSaver(client, db_name="career_navigator", serde=serde)
+        except ImportError:
+            print("Warning: langgraph-checkpoint-mongodb not installed, using in-memory checkpoints.")
+    return InMemorySaver(serde=serde)
+
+
 # Build the graph
 graph = StateGraph(GraphState)
 graph.add_node("reader", reading_agent)
-graph.add_node("ai_extractor", ai_skill_extract)
-graph.add_node("analyzer", find_and_analyze)
+# Only failed LLM steps are retried; an open circuit stops the run at once
+graph.add_node("ai_extractor", ai_skill_extract, retry_policy=RetryPolicy(max_attempts=NODE_MAX_ATTEMPTS, retry_on=StepFailed))
+graph.add_node("analyzer", find_and_analyze, retry_policy=RetryPolicy(max_attempts=NODE_MAX_ATTEMPTS, retry_on=StepFailed))
 
-graph.add_edge("reader", "ai_extractor")
+# Nothing to analyze if the PDF could not be read; skip the LLM nodes
+graph.add_conditional_edges(
+    "reader",
+    lambda state: "ai_extractor" if state.get("resume_text") else END,
+    ["ai_extractor", END]
+)
 graph.add_edge("ai_extractor", "analyzer")
 graph.add_edge("analyzer", END)
 
 # Set the entry point
 graph.set_entry_point("reader")
-app = graph.compile()
+checkpointer = _make_checkpointer()
+app = graph.compile(checkpointer=checkpointer)
 
 
 # def invoke_agent(file_path: str = "resume.pdf"):
@@ -144,20 +300,124 @@ app = graph.compile()
 #         "extracted_skills": extracted
 #     }
 #     return result
-def invoke_agent(file_path: str):
-    res = app.invoke({
+# Failed runs whose checkpoints are kept for resuming, oldest first, with when they failed
+_failed_runs: "OrderedDict[str, float]" = OrderedDict()
+_failed_runs_lock = threading.Lock()
+
+
+def _drop_stale_runs():
+    """Deletes the checkpoints of failed runs older than FAILED_RUN_TTL or beyond MAX_FAILED_RUNS."""
+    now = time.monotonic()
+    stale = []
+    with _failed_runs_lock:
+        while _failed_runs:
+            run_id, failed_at = next(iter(_failed_runs.items()))
+            if now - failed_at < FAILED_RUN_TTL and len(_failed_runs) <= MAX_FAILED_RUNS:
+                break
+            _failed_runs.popitem(last=False)
+            stale.append(run_id)
+    for run_id in stale:
+        checkpointer.delete_thread(run_id)
+
+
+def _run(graph_input, run_id: str, metadata: dict | None = None):
+    config = {"configurable": {"thread_id": run_id}, "metadata": metadata or {}}
+    # A run being resumed is not dropped while it runs; it is tracked again if it fails
+    with _failed_runs_lock:
+        _failed_runs.pop(run_id, None)
+    _drop_stale_runs()
+    try:
+        res = app.invoke(graph_input, config)
+    except Exception as e:
+        # The checkpoint of the last good node is kept so the run can be resumed
+        with _failed_runs_lock:
+            _failed_runs[run_id] = time.monotonic()
+        _drop_stale_runs()
+        raise AnalysisRunFailed(run_id, e) from e
+    # Completed runs are saved as a ResumeAnalysis; their checkpoints are no longer needed
+    checkpointer.delete_thread(run_id)
+
+    extracted = res.get("extracted_skills")
+    analysis = res.get("analysis_result")
+    section_results = res.get("section_results") or {}
+    prompt_stats = res.get("prompt_stats")
+    if prompt_stats:
+        prompt_stats["tokens_saved"] = prompt_stats["baseline_prompt_tokens"] - prompt_stats["prompt_tokens"]
+        print(f"---Prompt tokens: {prompt_stats['prompt_tokens']} (saved {prompt_stats['tokens_saved']})---")
+
+    return {
+        "analysis": analysis.model_dump() if analysis else {},
+        "extracted_skills": extracted.model_dump() if extracted else {},
+        "resume_text": res.get("resume_text"),
+        "prompt_stats": prompt_stats,
+        "sections": [
+            {"name": name, "hash": result["hash"], "extraction": result["extraction"]}
+            for name, result in section_results.items()
+        ]
+    }
+
+
+def invoke_agent(file_path: str, previous_sections: dict | None = None, raw_text: str | None = None,
+                 run_id: str | None = None, metadata: dict | None = None):
+    """
+    Runs the resume graph on a PDF.
+    Args:
+        file_path: Path to the uploaded PDF.
+        previous_sections: Section name -> {"hash", "extraction"} from the user's
+            previous analysis, used to skip extraction of unchanged sections.
+        raw_text: Text already extracted from the PDF, if any.
+        run_id: Checkpoint thread id, used to resume the run if it fails.
+        metadata: Stored with the checkpoints (e.g. owner and filename).
+    Raises:
+        AnalysisRunFailed: If a node still fails after its retries.
+    """
+    return _run({
         "file_name": file_path,
+        "raw_text": raw_text,
         "resume_text": None,
+        "sections": None,
+        "prompt_text": None,
+        "prompt_stats": None,
+        "previous_sections": previous_sections,
+        "section_results": None,
         "extracted_skills": None,
         "analysis_result": None
-    })
+    }, run_id or uuid.uuid4().hex, metadata)
 
-    extracted = res.get("extracted_skills")
-    analysis = res.get("analysis_result")
 
+def resume_agent(run_id: str, metadata: dict | None = None):
+    """
+    Resumes a failed run from its last good node.
+    Args:
+        metadata: Stored with the new checkpoints. Pass the run's owner and filename
+            again, or a run failing once more could no longer be found by its owner.
+    """
+    return _run(None, run_id, metadata)
+
+
+def run_status(run_id: str) -> dict | None:
+    """
+    Status of each node of a failed (resumable) run: done, failed or pending.
+    Returns None if no checkpoint exists for the run.
+    """
+    snapshot = app.get_state({"configurable": {"thread_id": run_id}})
+    if not snapshot.values:
+        return None
+    pending = list(snapshot.next)
+    errors = {task.name: str(task.error) for task in snapshot.tasks if task.error}
+    nodes = {}
+    for name in NODES:
+        if pending and name == pending[0]:
+            nodes[name] = "failed" if name in errors else "pending"
+        elif pending and NODES.index(name) > NODES.index(pending[0]):
+            nodes[name] = "pending"
+        else:
+            nodes[name] = "done"
     return {
-        "analysis": analysis.model_dump() if analysis else {},
-        "extracted_skills": extracted.model_dump() if extracted else {}
+        "run_id": run_id,
+        "nodes": nodes,
+        "errors": errors,
+        "metadata": snapshot.metadata or {}
     }
 
 
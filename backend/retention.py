@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from beanie import PydanticObjectId
+from beanie.operators import Set, Inc, In
+
+from models import InterviewSession, ResumeAnalysis, ArchivedAnalysis, ArchivedSummaryView, UserRoadmap, DocumentVersion
+from session_cache import session_cache
+
+# Sessions untouched for this long are considered abandoned and closed
+SESSION_IDLE_DAYS = int(os.getenv("RETENTION_SESSION_IDLE_DAYS", "14"))
+# Closed sessions are removed by the TTL index this long after being marked
+SESSION_EXPIRE_DAYS = int(os.getenv("RETENTION_SESSION_EXPIRE_DAYS", "30"))
+# Analyses older than this move to the compressed archive collection
+ARCHIVE_AFTER_DAYS = int(os.getenv("RETENTION_ARCHIVE_AFTER_DAYS", "180"))
+# How often the retention sweep runs
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "6"))
+# Documents handled per batch when archiving or purging
+BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "200"))
+
+
+def compress_analysis(analysis: ResumeAnalysis) -> bytes:
+    return zlib.compress(json.dumps(analysis.model_dump(mode="json")).encode("utf-8"), 9)
+
+
+def decompress_analysis(archived: ArchivedAnalysis) -> dict:
+    return json.loads(zlib.decompress(archived.payload).decode("utf-8"))
+
+
+def archived_summary(item: ArchivedSummaryView) -> dict:
+    """History list entry for an archived analysis; its details stay at /career/analysis/{id}."""
+    return {
+        "id": item.analysis_id,
+        "filename": item.filename,
+        "created_at": item.created_at,
+        "score": item.score or 0,
+        "domain": item.domain or "N/A",
+        "archived": True
+    }
+
+
+async def expire_abandoned_sessions() -> int:
+    """
+    Closes sessions idle past SESSION_IDLE_DAYS and schedules them for TTL removal.
+    Sessions in use in this worker's session cache are skipped, since Mongo may
+    not have their latest turn yet, and cached copies of closed sessions are
+    marked closed so they stop accepting turns.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=SESSION_IDLE_DAYS)
+    in_use = [PydanticObjectId(sid) for sid in session_cache.in_use(SESSION_IDLE_DAYS * 86400)]
+    abandoned = await InterviewSession.find({
+        "_id": {"$nin": in_use},
+        "expires_at": None,
+        # Sessions written before versioning have no updated_at
+        "$or": [
+            {"updated_at": {"$lt": cutoff}},
+            {"updated_at": {"$exists": False}, "created_at": {"$lt": cutoff}}
+        ]
+    }).project(DocumentVersion).to_list()
+    if not abandoned:
+        return 0
+
+    ids = [doc.id for doc in abandoned]
+    expires_at = now + timedelta(days=SESSION_EXPIRE_DAYS)
+    result = await InterviewSession.find({"_id": {"$in": ids}}).update(
+        Set({
+            InterviewSession.is_active: False,
+            InterviewSession.expires_at: expires_at,
+            InterviewSession.updated_at: now
+        }),
+        Inc({InterviewSession.version: 1})
+    )
+    session_cache.mark_closed([str(i) for i in ids], expires_at)
+    return result.modified_count if result else 0
+
+
+async def archive_old_analyses() -> int:
+    """Moves analyses older than ARCHIVE_AFTER_DAYS to the compressed archive, in batches."""
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    archived = 0
+    while True:
+        batch = await ResumeAnalysis.find(ResumeAnalysis.created_at < cutoff).limit(BATCH_SIZE).to_list()
+        if not batch:
+            return archived
+        # Drop copies left by an interrupted earlier run so archiving stays idempotent
+        await ArchivedAnalysis.find(In(ArchivedAnalysis.analysis_id, [str(item.id) for item in batch])).delete()
+        await ArchivedAnalysis.insert_many([
+            ArchivedAnalysis(
+                user_id=item.user_id,
+                analysis_id=str(item.id),
+                filename=item.filename,
+                created_at=item.created_at,
+                score=item.analysis_data.get("analysis", {}).get("score"),
+                domain=item.analysis_data.get("analysis", {}).get("identified_domain"),
+                payload=compress_analysis(item)
+            ) for item in batch
+        ])
+        await ResumeAnalysis.find({"_id": {"$in": [item.id for item in batch]}}).delete()
+        archived += len(batch)
+
+
+async def purge_user_data(user_id: str):
+    """Deletes every document owned by a deleted user, in batches to keep each write small."""
+    for model in (InterviewSession, ResumeAnalysis, ArchivedAnalysis, UserRoadmap):
+        while True:
+            docs = await model.find(model.user_id == user_id).limit(BATCH_SIZE).project(DocumentVersion).to_list()
+            ids = [doc.id for doc in docs]
+            if not ids:
+                break
+            await model.find({"_id": {"$in": ids}}).delete()
+            await asyncio.sleep(0)
+
+
+async def run_retention():
+    sessions = await expire_abandoned_sessions()
+    analyses = await archive_old_analyses()
+    print(f"---Retention: closed {sessions} abandoned sessions, archived {analyses} analyses---")
+
+
+async def retention_loop():
+    """Runs the retention sweep periodically; started from the app lifespan."""
+    while True:
+        try:
+            await run_retention()
+        except Exception as e:
+            print(f"Error running retention: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_HOURS * 3600)
+
+
+async def storage_report() -> dict:
+    """Document count and data/index size per collection."""
+    report = {}
+    for model in (InterviewSession, ResumeAnalysis, ArchivedAnalysis, UserRoadmap):
+        collection = model.get_motor_collection()
+        stats = await collection.database.command("collStats", collection.name)
+        report[collection.name] = {
+            "count": stats.get("count", 0),
+            "size": stats.get("size", 0),
+            "storage_size": stats.get("storageSize", 0),
+            "index_size": stats.get("totalIndexSize", 0),
+        }
+    return report
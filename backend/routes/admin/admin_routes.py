@@ -0,0 +1,42 @@
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, HTTPException
+
+from auth import require_admin
+from history_export import export_response
+from models import User
+from profiling import profile_store
+from retention import run_retention, storage_report
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/storage")
+async def get_storage_report():
+    """Document count and data/index size of the user-data collections."""
+    return await storage_report()
+
+@router.post("/retention/run")
+async def trigger_retention():
+    """Run the retention sweep now and report storage afterwards."""
+    await run_retention()
+    return await storage_report()
+
+@router.get("/users/{user_id}/export")
+async def export_user(user_id: str, format: str = "ndjson"):
+    """Stream a user's full history for support."""
+    user = await User.get(user_id) if PydanticObjectId.is_valid(user_id) else None
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return export_response(user, format)
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recently captured request profiles, newest first."""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """A request profile in speedscope format, viewable at https://www.speedscope.app."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
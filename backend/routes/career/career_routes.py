@@ -1,20 +1,34 @@
+import asyncio
 import shutil
 import os
+import uuid
 from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from resume_analyzer import invoke_agent
+from beanie import PydanticObjectId
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Response
+from resume_analyzer import invoke_agent, resume_agent, run_status, AnalysisRunFailed
 from auth import get_current_user
-from models import User, ResumeAnalysis
+from models import User, ResumeAnalysis, ArchivedAnalysis, ArchivedSummaryView, DocumentVersion, ResumeSectionsView
+from retention import decompress_analysis, archived_summary
+from utils.etag import make_etag, etag_matches, not_modified, collection_etag
+from utils.rate_limit import rate_limit, llm_scheduler
+from utils.preflight import check_upload, PreflightError
+from utils.circuit_breaker import CircuitOpen, retry_after_header
 
 router = APIRouter()
 
 # Maximum file size: 10MB
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Checkpoint metadata carried over when a run is resumed
+RUN_METADATA_KEYS = ("user_id", "filename")
+
+# Runs being resumed in this worker, so one run cannot be resumed twice at once
+_resuming_runs = set()
+
 @router.post("/analyze")
 async def analyze_resume(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limit("career_analyze"))
 ):
     """Endpoint to analyze a resume and return career insights."""
     if not file.filename.endswith(".pdf"):
@@ -27,6 +41,12 @@ async def analyze_resume(
             status_code=400,
             detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE / (1024 * 1024)}MB"
         )
+
+    # Reject non-PDFs, scans, oversized and non-resume documents before any LLM call
+    try:
+        await asyncio.to_thread(check_upload, contents)
+    except PreflightError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     
     # Save the uploaded file temporarily
     temp_file_path = f"temp_{file.filename}"
@@ -34,19 +54,24 @@ async def analyze_resume(
         with open(temp_file_path, "wb") as buffer:
             buffer.write(contents)
         
-        # Invoke the agent with the file path
-        res = invoke_agent(temp_file_path)
-        
-        # Save analysis to database
-        db_analysis = ResumeAnalysis(
-            user_id=str(current_user.id),
-            filename=file.filename,
-            analysis_data=res
-        )
-        await db_analysis.insert()
-        
-        return {"message": "Resume analyzed successfully", "data": res, "id": str(db_analysis.id)}
+        # Reuse section extractions from the user's previous upload where unchanged
+        previous = await ResumeAnalysis.find(
+            ResumeAnalysis.user_id == str(current_user.id)
+        ).sort("-created_at").project(ResumeSectionsView).first_or_none()
+        previous_sections = {s.name: s.model_dump() for s in previous.sections} if previous else None
+
+        # Invoke the agent with the file path; the run is checkpointed under run_id
+        run_id = uuid.uuid4().hex
+        metadata = {"user_id": str(current_user.id), "filename": file.filename}
+        async with llm_scheduler.slot(str(current_user.id)):
+            res = await asyncio.to_thread(invoke_agent, temp_file_path, previous_sections,
+                                          run_id=run_id, metadata=metadata)
+        return await _save_analysis(current_user, file.filename, res)
     
+    except AnalysisRunFailed as e:
+        raise _run_failed(e)
+    except HTTPException:
+        raise
     except Exception as e:
         print("Resume analysis error:", e)
         raise HTTPException(
@@ -58,13 +83,101 @@ async def analyze_resume(
         if os.path.exists(temp_file_path):
             os.remove(temp_file_path)
 
+async def _save_analysis(current_user: User, filename: str, res: dict):
+    resume_text = res.pop("resume_text")
+    if not resume_text:
+        raise HTTPException(status_code=400, detail="The PDF text could not be extracted.")
+    sections = res.pop("sections")
+    prompt_stats = res.pop("prompt_stats")
+    
+    # Save analysis to database
+    db_analysis = ResumeAnalysis(
+        user_id=str(current_user.id),
+        filename=filename,
+        analysis_data=res,
+        resume_text=resume_text,
+        sections=sections,
+        prompt_stats=prompt_stats
+    )
+    await db_analysis.insert()
+    
+    return {"message": "Resume analyzed successfully", "data": res, "id": str(db_analysis.id)}
+
+def _run_failed(e: AnalysisRunFailed) -> HTTPException:
+    print("Resume analysis error:", e)
+    status = run_status(e.run_id) or {}
+    if isinstance(e.error, CircuitOpen):
+        # The run is kept at its last checkpoint, queued for the client to resume
+        return HTTPException(
+            status_code=503,
+            detail={
+                "message": "The analysis service is temporarily unavailable. Your upload is saved; resume the run after the Retry-After delay.",
+                "run_id": e.run_id,
+                "nodes": status.get("nodes", {})
+            },
+            headers=retry_after_header(e.error)
+        )
+    return HTTPException(
+        status_code=503,
+        detail={
+            "message": "Resume analysis did not finish. Resume the run to continue without re-uploading.",
+            "run_id": e.run_id,
+            "nodes": status.get("nodes", {})
+        }
+    )
+
+def _owned_run(run_id: str, current_user: User) -> dict:
+    status = run_status(run_id)
+    if not status or status["metadata"].get("user_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Analysis run not found")
+    return status
+
+@router.get("/runs/{run_id}")
+async def get_run_status(
+    run_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Per-node status of an analysis run that did not finish."""
+    status = _owned_run(run_id, current_user)
+    return {"run_id": run_id, "nodes": status["nodes"], "errors": status["errors"]}
+
+@router.post("/runs/{run_id}/resume")
+async def resume_run(
+    run_id: str,
+    current_user: User = Depends(rate_limit("career_analyze"))
+):
+    """Resume a failed analysis run from its last completed node."""
+    status = _owned_run(run_id, current_user)
+    if run_id in _resuming_runs:
+        raise HTTPException(status_code=409, detail="This analysis run is already being resumed.")
+    metadata = {key: status["metadata"][key] for key in RUN_METADATA_KEYS if key in status["metadata"]}
+    _resuming_runs.add(run_id)
+    try:
+        async with llm_scheduler.slot(str(current_user.id)):
+            res = await asyncio.to_thread(resume_agent, run_id, metadata)
+        return await _save_analysis(current_user, metadata.get("filename", "resume.pdf"), res)
+    except AnalysisRunFailed as e:
+        raise _run_failed(e)
+    finally:
+        _resuming_runs.discard(run_id)
+
 @router.get("/history", response_model=List[dict])
 async def get_history(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
-    """Fetch history of resume analyses for the current user."""
+    """Fetch history of resume analyses for the current user, including archived ones."""
+    query = ResumeAnalysis.find(ResumeAnalysis.user_id == str(current_user.id))
+    archived_query = ArchivedAnalysis.find(ArchivedAnalysis.user_id == str(current_user.id))
+    # Archived analyses never change, so their count and newest id are enough to tag them
+    etag = await collection_etag(query, "history", await collection_etag(archived_query))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     # Find all analyses for this user, sorted by created_at desc
-    results = await ResumeAnalysis.find(ResumeAnalysis.user_id == str(current_user.id)).sort("-created_at").to_list()
+    results = await query.sort("-created_at").to_list()
     
     # We'll return a simplified list for history (just metadata + maybe score)
     history = []
@@ -74,25 +187,56 @@ async def get_history(
             "filename": item.filename,
             "created_at": item.created_at,
             "score": item.analysis_data.get("analysis", {}).get("score", 0),
-            "domain": item.analysis_data.get("analysis", {}).get("identified_domain", "N/A")
+            "domain": item.analysis_data.get("analysis", {}).get("identified_domain", "N/A"),
+            "archived": False
         })
+
+    # Archived analyses are older than every live one, so they follow in date order
+    archived = await archived_query.sort("-created_at").project(ArchivedSummaryView).to_list()
+    history.extend(archived_summary(item) for item in archived)
     return history
 
 @router.get("/analysis/{analysis_id}")
 async def get_analysis_detail(
     analysis_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Fetch details of a specific past analysis."""
-    analysis = await ResumeAnalysis.find_one(ResumeAnalysis.id == analysis_id if len(analysis_id) == 24 else None) 
-    # Beanie handles ObjectId conversion automatically if we pass the ObjectId, but if we query by 'id', it usually expects ObjectId type or string if configured.
-    # Actually, simpler: await ResumeAnalysis.get(analysis_id)
-    
-    if not analysis:
-        # try finding by custom query if .get() fails or if we want to ensure ownership
-        analysis = await ResumeAnalysis.get(analysis_id)
-    
+    if not PydanticObjectId.is_valid(analysis_id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    # Check the ETag against a projection before loading analysis_data
+    current = await ResumeAnalysis.find_one(
+        ResumeAnalysis.id == PydanticObjectId(analysis_id),
+        ResumeAnalysis.user_id == str(current_user.id)
+    ).project(DocumentVersion)
+    if not current:
+        # Old analyses live compressed in the archive collection
+        archived_filter = (
+            ArchivedAnalysis.analysis_id == analysis_id,
+            ArchivedAnalysis.user_id == str(current_user.id)
+        )
+        if not await ArchivedAnalysis.find_one(*archived_filter).project(ArchivedSummaryView):
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        # An archived analysis never changes, so its id is enough for the tag
+        etag = make_etag(analysis_id, "archived")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        archived = await ArchivedAnalysis.find_one(*archived_filter)
+        if not archived:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        response.headers["ETag"] = etag
+        return decompress_analysis(archived)["analysis_data"]
+
+    etag = make_etag(current.id, current.version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    analysis = await ResumeAnalysis.get(analysis_id)
     if not analysis or analysis.user_id != str(current_user.id):
         raise HTTPException(status_code=404, detail="Analysis not found")
-    
+
+    response.headers["ETag"] = make_etag(analysis.id, analysis.version)
     return analysis.analysis_data
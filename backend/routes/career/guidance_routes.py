@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+from functools import partial
+from datetime import datetime
+from beanie.operators import Set, Inc
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
 
 from auth import get_current_user
-from models import User, UserRoadmap, UserRoadmapStep
-from guidance_agent import generate_roadmap, get_topic_details, generate_quiz
-from ai_schema.schema import CareerRoadmap
+from models import User, UserRoadmap, UserRoadmapStep, DocumentVersion
+from guidance_agent import generate_roadmap, stream_roadmap, get_topic_details, generate_quiz
+from ai_schema.schema import CareerRoadmap, RoadmapStep
+from utils.etag import make_etag, etag_matches, not_modified
+from utils.single_flight import single_flight
+from utils.rate_limit import rate_limit, llm_scheduler
+from utils.circuit_breaker import CircuitOpen
 
 router = APIRouter()
 
@@ -30,15 +40,74 @@ class UserRoadmapRead(BaseModel):
 @router.post("/generate", response_model=CareerRoadmap)
 async def generate_career_roadmap_endpoint(
     request: RoadmapRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limit("guidance_generate"))
 ):
     if not request.job_role.strip():
         raise HTTPException(status_code=400, detail="Job role cannot be empty.")
-    roadmap = generate_roadmap(request.job_role)
+    # Identical concurrent requests share one in-flight LLM call; only the
+    # request that issues it takes a scheduler slot
+    roadmap = await single_flight.run(
+        generate_roadmap, request.job_role,
+        slot=partial(llm_scheduler.slot, str(current_user.id))
+    )
     if not roadmap:
         raise HTTPException(status_code=500, detail="Failed to generate roadmap.")
     return roadmap
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _roadmap_events(job_role: str, user_id: str):
+    started = time.perf_counter()
+    first_step_ms = None
+    index = 0
+    try:
+        # Slot is taken inside the stream, so a shed request gets an error event
+        async with llm_scheduler.slot(user_id):
+            async for item in stream_roadmap(job_role):
+                elapsed_ms = round((time.perf_counter() - started) * 1000)
+                if isinstance(item, RoadmapStep):
+                    if first_step_ms is None:
+                        first_step_ms = elapsed_ms
+                    yield _sse("step", {"index": index, "step": item.model_dump(), "elapsed_ms": elapsed_ms})
+                    index += 1
+                else:
+                    print(f"---Roadmap for {job_role}: first step after {first_step_ms} ms, complete after {elapsed_ms} ms---")
+                    yield _sse("roadmap", {
+                        "roadmap": item.model_dump(),
+                        "time_to_first_step_ms": first_step_ms,
+                        "total_ms": elapsed_ms
+                    })
+    except HTTPException as e:
+        yield _sse("error", {"status": e.status_code, "detail": e.detail})
+    except CircuitOpen as e:
+        yield _sse("error", {
+            "status": 503,
+            "detail": "The AI service is temporarily unavailable. Please retry shortly.",
+            "retry_after": round(e.retry_after)
+        })
+    except Exception as e:
+        print(f"Error streaming roadmap: {e}")
+        yield _sse("error", {"status": 500, "detail": "Failed to generate roadmap."})
+
+@router.post("/generate/stream")
+async def stream_career_roadmap_endpoint(
+    request: RoadmapRequest,
+    current_user: User = Depends(rate_limit("guidance_generate"))
+):
+    """
+    Server-sent events version of /generate. Sends a "step" event per roadmap step
+    as soon as it is complete and a final "roadmap" event with the validated
+    CareerRoadmap (ready for /save) and the time to first step.
+    """
+    if not request.job_role.strip():
+        raise HTTPException(status_code=400, detail="Job role cannot be empty.")
+    return StreamingResponse(
+        _roadmap_events(request.job_role, str(current_user.id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/save")
 async def save_roadmap(
     roadmap_data: CareerRoadmap,
@@ -46,7 +115,10 @@ async def save_roadmap(
 ):
     """Save a generated roadmap as the active roadmap for the user."""
     # Deactivate existing roadmaps
-    await UserRoadmap.find(UserRoadmap.user_id == str(current_user.id)).set({UserRoadmap.is_active: False})
+    await UserRoadmap.find(UserRoadmap.user_id == str(current_user.id)).update(
+        Set({UserRoadmap.is_active: False, UserRoadmap.updated_at: datetime.utcnow()}),
+        Inc({UserRoadmap.version: 1})
+    )
     
     # Create steps
     steps_objects = []
@@ -71,15 +143,25 @@ async def save_roadmap(
 
 @router.get("/active")
 async def get_active_roadmap(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get the user's currently active roadmap."""
-    roadmap = await UserRoadmap.find_one(
+    # Check the ETag against a projection before loading the steps
+    current = await UserRoadmap.find_one(
         UserRoadmap.user_id == str(current_user.id),
         UserRoadmap.is_active == True
-    )
+    ).project(DocumentVersion)
+    etag = make_etag(current.id, current.version) if current else make_etag("none")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    roadmap = await UserRoadmap.get(current.id) if current else None
     if not roadmap:
+        response.headers["ETag"] = make_etag("none")
         return None
+    response.headers["ETag"] = make_etag(roadmap.id, roadmap.version)
     
     # Sort steps by order_index just in case, though list order is preserved
     roadmap.steps.sort(key=lambda x: x.order_index)
@@ -124,17 +206,23 @@ async def update_step_status(
 @router.post("/details")
 async def get_details(
     request: TopicRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limit("guidance_details"))
 ):
     """Get detailed explanation for a topic."""
-    details = get_topic_details(request.topic, request.role)
+    details = await single_flight.run(
+        get_topic_details, request.topic, request.role,
+        slot=partial(llm_scheduler.slot, str(current_user.id))
+    )
     return {"content": details}
 
 @router.post("/quiz")
 async def get_quiz(
     request: QuizRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limit("guidance_quiz"))
 ):
     """Get a quiz for a topic."""
-    questions = generate_quiz(request.topic)
+    questions = await single_flight.run(
+        generate_quiz, request.topic,
+        slot=partial(llm_scheduler.slot, str(current_user.id))
+    )
     return questions
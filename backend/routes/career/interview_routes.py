@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
 from typing import List
 from datetime import datetime
 
-from auth import get_current_user
+from auth import get_current_user, get_user_from_token
 from models import User, InterviewSession, InterviewMessage
-from interview_agent import generate_interview_response
+from interview_agent import generate_interview_response, stream_interview_response
+from session_cache import session_cache
 from pydantic import BaseModel
+from utils.etag import etag_matches, not_modified, collection_etag
+from utils.rate_limit import rate_limit, check_rate_limit, llm_scheduler
 
 router = APIRouter()
 
+# Seconds without client traffic before the server sends a ping
+HEARTBEAT_INTERVAL = 30
+# Unanswered pings before the connection is considered dead
+MAX_MISSED_HEARTBEATS = 2
+# Seconds a new connection has to send its auth frame
+AUTH_TIMEOUT = 10
+
 class SessionStartRequest(BaseModel):
     job_role: str
 
@@ -57,10 +69,18 @@ async def start_session(
 
 @router.get("/sessions", response_model=List[SessionRead])
 async def get_sessions(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get all interview sessions for the current user."""
-    sessions = await InterviewSession.find(InterviewSession.user_id == str(current_user.id)).sort("-created_at").to_list()
+    query = InterviewSession.find(InterviewSession.user_id == str(current_user.id))
+    etag = await collection_etag(query, "sessions")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    sessions = await query.sort("-created_at").to_list()
     return [
         SessionRead(
             id=str(s.id),
@@ -76,9 +96,14 @@ async def get_messages(
     current_user: User = Depends(get_current_user)
 ):
     """Get chat history for a specific session."""
-    session = await InterviewSession.find_one(InterviewSession.id == session_id if len(session_id) == 24 else None)
-    if not session:
-        session = await InterviewSession.get(session_id)
+    # Prefer the cached copy: it includes messages not yet written behind
+    cached = session_cache.peek(session_id)
+    if cached:
+        session = cached.session
+    else:
+        session = await InterviewSession.find_one(InterviewSession.id == session_id if len(session_id) == 24 else None)
+        if not session:
+            session = await InterviewSession.get(session_id)
 
     if not session or session.user_id != str(current_user.id):
         raise HTTPException(status_code=404, detail="Session not found")
@@ -89,41 +114,40 @@ async def get_messages(
 async def chat(
     session_id: str,
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(rate_limit("interview_chat"))
 ):
     """Send a message to the interviewer and get a response."""
     # Verify session
-    session = await InterviewSession.find_one(InterviewSession.id == session_id if len(session_id) == 24 else None)
-    if not session:
-         session = await InterviewSession.get(session_id)
-
-    if not session or session.user_id != str(current_user.id):
+    entry = await session_cache.get(session_id)
+    if not entry or entry.session.user_id != str(current_user.id):
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    if not session.is_active:
-         raise HTTPException(status_code=400, detail="This interview session has ended.")
 
-    # 1. Save User Message
-    user_msg = InterviewMessage(
-        sender="user",
-        content=chat_request.message
-    )
-    session.messages.append(user_msg)
-    
-    # 2. Context for AI
-    history_dicts = [{"sender": msg.sender, "content": msg.content} for msg in session.messages]
-    
-    # 3. Generate AI Response
-    ai_response_text = generate_interview_response(session.job_role, history_dicts)
-    
-    # 4. Save AI Response
-    ai_msg = InterviewMessage(
-        sender="ai",
-        content=ai_response_text
-    )
-    session.messages.append(ai_msg)
-    
-    await session.save()
+    # Serialize concurrent turns on the same session
+    async with entry.lock:
+        session = entry.session
+        if not session.is_active:
+             raise HTTPException(status_code=400, detail="This interview session has ended.")
+
+        # 1. Save User Message
+        user_msg = InterviewMessage(
+            sender="user",
+            content=chat_request.message
+        )
+        session_cache.append(entry, user_msg)
+        
+        # 2. Context for AI
+        history_dicts = [{"sender": msg.sender, "content": msg.content} for msg in session.messages]
+        
+        # 3. Generate AI Response (off the event loop so write-behind flushes keep running)
+        async with llm_scheduler.slot(str(current_user.id)):
+            ai_response_text = await asyncio.to_thread(generate_interview_response, session.job_role, history_dicts)
+        
+        # 4. Save AI Response
+        ai_msg = InterviewMessage(
+            sender="ai",
+            content=ai_response_text
+        )
+        session_cache.append(entry, ai_msg)
     
     return MessageRead(
         sender=ai_msg.sender,
@@ -131,3 +155,146 @@ async def chat(
         timestamp=ai_msg.timestamp
     )
 
+async def _send_rejection(websocket: WebSocket, exc: HTTPException):
+    await websocket.send_json({
+        "type": "error",
+        "detail": exc.detail,
+        "retry_after": int(exc.headers["Retry-After"])
+    })
+
+async def _receive_frame(websocket: WebSocket, timeout: float):
+    """
+    Receives the next frame. Returns None if it is not a JSON object: invalid
+    JSON, another JSON value such as a list, or a binary frame.
+    Raises:
+        asyncio.TimeoutError: If no frame arrives within timeout seconds.
+    """
+    try:
+        data = await asyncio.wait_for(websocket.receive_json(), timeout=timeout)
+    except (ValueError, KeyError):
+        return None
+    return data if isinstance(data, dict) else None
+
+async def _authenticate(websocket: WebSocket):
+    """Reads the auth frame, {"type": "auth", "token": ...}, and returns its user or None."""
+    try:
+        data = await _receive_frame(websocket, AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if data is None or data.get("type") != "auth" or not isinstance(data.get("token"), str):
+        return None
+    return await get_user_from_token(data["token"])
+
+@router.websocket("/sessions/{session_id}/ws")
+async def interview_socket(
+    websocket: WebSocket,
+    session_id: str,
+    last_seen: int = 0
+):
+    """
+    WebSocket transport for an interview session. The token is checked once per
+    connection; the session lives in the hot session cache and messages are
+    written behind as they happen.
+
+    The token is not accepted in the URL, where it would end up in access logs.
+    The first frame after the handshake must be {"type": "auth", "token": ...};
+    without a valid one within AUTH_TIMEOUT seconds the socket is closed with 1008.
+
+    Client -> server: {"type": "auth", "token": ...}, {"type": "message", "content": ...}, {"type": "ping"}, {"type": "pong"}
+    Server -> client: {"type": "history", "messages": [...], "total": n}, {"type": "chunk", "content": ...},
+    {"type": "message", "message": {...}}, {"type": "ping"}, {"type": "pong"}, {"type": "error", "detail": ...}
+
+    A reconnecting client passes last_seen (the number of messages it already has)
+    and receives only the messages it missed.
+    """
+    await websocket.accept()
+    try:
+        user = await _authenticate(websocket)
+    except WebSocketDisconnect:
+        return
+    # Pinned so the cache never evicts it while the socket is open, even when idle
+    entry = await session_cache.get(session_id, pin=True) if user else None
+    if entry and entry.session.user_id != str(user.id):
+        session_cache.release(entry)
+        entry = None
+    if not entry:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    session = entry.session
+
+    missed = 0
+    try:
+        await websocket.send_json({
+            "type": "history",
+            "messages": jsonable_encoder(session.messages[max(last_seen, 0):]),
+            "total": len(session.messages),
+            "is_active": session.is_active
+        })
+
+        while True:
+            try:
+                data = await _receive_frame(websocket, HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                missed += 1
+                if missed > MAX_MISSED_HEARTBEATS:
+                    await websocket.close(code=status.WS_1001_GOING_AWAY)
+                    return
+                await websocket.send_json({"type": "ping"})
+                continue
+            missed = 0
+            if data is None:
+                await websocket.send_json({"type": "error", "detail": "Expected a JSON object frame."})
+                continue
+
+            kind = data.get("type")
+            if kind == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            if kind == "pong":
+                continue
+            content = str(data.get("content", "")).strip()
+            if kind != "message" or not content:
+                await websocket.send_json({"type": "error", "detail": "Expected a non-empty message."})
+                continue
+            try:
+                await check_rate_limit("interview_chat", str(user.id))
+            except HTTPException as e:
+                await _send_rejection(websocket, e)
+                continue
+
+            async with entry.lock:
+                if not session.is_active:
+                    await websocket.send_json({"type": "error", "detail": "This interview session has ended."})
+                    continue
+
+                try:
+                    async with llm_scheduler.slot(str(user.id)):
+                        user_msg = InterviewMessage(sender="user", content=content)
+                        session_cache.append(entry, user_msg)
+                        await websocket.send_json({"type": "message", "message": jsonable_encoder(user_msg)})
+
+                        history_dicts = [{"sender": msg.sender, "content": msg.content} for msg in session.messages]
+                        parts = []
+                        connected = True
+                        async for chunk in stream_interview_response(session.job_role, history_dicts):
+                            parts.append(chunk)
+                            if connected:
+                                try:
+                                    await websocket.send_json({"type": "chunk", "content": chunk})
+                                except (WebSocketDisconnect, RuntimeError):
+                                    # Keep generating so the reply is persisted for a resuming client
+                                    connected = False
+                except HTTPException as e:
+                    # Shed before the message was stored; the client may resend after Retry-After
+                    await _send_rejection(websocket, e)
+                    continue
+
+                ai_msg = InterviewMessage(sender="ai", content="".join(parts))
+                session_cache.append(entry, ai_msg)
+            if not connected:
+                return
+            await websocket.send_json({"type": "message", "message": jsonable_encoder(ai_msg)})
+    except WebSocketDisconnect:
+        return
+    finally:
+        session_cache.release(entry)
@@ -1,10 +1,21 @@
 from fastapi import APIRouter
+from utils.single_flight import single_flight
+from utils import preflight
+from utils.circuit_breaker import breakers, CLOSED
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {"status": "ok", "message": "Server is running"}
+    circuits = {name: breaker.snapshot() for name, breaker in breakers.items()}
+    degraded = any(c["state"] != CLOSED for c in circuits.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "message": "Server is running",
+        "llm_calls": dict(single_flight.stats),
+        "upload_preflight": dict(preflight.stats),
+        "circuits": circuits
+    }
 
 @router.get("/info")
 async def server_info():
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from collections import Counter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from models import User, UserCreate, UserRead, Token, UserUpdate, PasswordChange
+from models import (
+    User, UserCreate, UserRead, Token, UserUpdate, PasswordChange,
+    ResumeAnalysis, AnalysisSummaryView, ArchivedAnalysis, ArchivedSummaryView,
+    InterviewSession, SessionSummaryView, UserRoadmap, RoadmapProgressView
+)
 from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from retention import purge_user_data, archived_summary
+from history_export import export_response
 
 router = APIRouter()
 
+# Number of recent analyses and sessions shown on the dashboard
+DASHBOARD_RECENT_ITEMS = 5
+
 @router.post("/signup", response_model=UserRead)
 async def signup(user: UserCreate):
     db_user = await User.find_one(User.email == user.email)
@@ -61,9 +72,76 @@ async def change_password(
     await current_user.save()
     return {"message": "Password changed successfully"}
 
+@router.get("/me/dashboard")
+async def get_dashboard(current_user: User = Depends(get_current_user)):
+    """Landing page data in one call: profile, active roadmap progress, recent analyses and sessions."""
+    user_id = str(current_user.id)
+    roadmap, analyses, archived, sessions = await asyncio.gather(
+        UserRoadmap.find_one(
+            UserRoadmap.user_id == user_id,
+            UserRoadmap.is_active == True
+        ).project(RoadmapProgressView),
+        ResumeAnalysis.find(ResumeAnalysis.user_id == user_id)
+            .sort("-created_at").limit(DASHBOARD_RECENT_ITEMS)
+            .project(AnalysisSummaryView).to_list(),
+        # Fills the list when the user has fewer recent live analyses
+        ArchivedAnalysis.find(ArchivedAnalysis.user_id == user_id)
+            .sort("-created_at").limit(DASHBOARD_RECENT_ITEMS)
+            .project(ArchivedSummaryView).to_list(),
+        InterviewSession.find(InterviewSession.user_id == user_id)
+            .sort("-created_at").limit(DASHBOARD_RECENT_ITEMS)
+            .project(SessionSummaryView).to_list(),
+    )
+
+    progress = None
+    if roadmap:
+        counts = Counter(step.status for step in roadmap.steps)
+        progress = {
+            "id": str(roadmap.id),
+            "role": roadmap.role,
+            "total": len(roadmap.steps),
+            "todo": counts["todo"],
+            "in_progress": counts["in_progress"],
+            "done": counts["done"],
+        }
+
+    return {
+        "user": UserRead(id=current_user.id, email=current_user.email, name=current_user.name),
+        "roadmap": progress,
+        "analyses": ([
+            {
+                "id": str(item.id),
+                "filename": item.filename,
+                "created_at": item.created_at,
+                "score": item.analysis_data.get("analysis", {}).get("score", 0),
+                "domain": item.analysis_data.get("analysis", {}).get("identified_domain", "N/A"),
+                "archived": False
+            } for item in analyses
+        ] + [archived_summary(item) for item in archived])[:DASHBOARD_RECENT_ITEMS],
+        "sessions": [
+            {
+                "id": str(s.id),
+                "job_role": s.job_role,
+                "created_at": s.created_at,
+                "is_active": s.is_active
+            } for s in sessions
+        ],
+    }
+
+@router.get("/me/export")
+async def export_user_me(
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the user's full history (analyses, roadmaps, interviews) as NDJSON or zip."""
+    return export_response(current_user, format)
+
 @router.delete("/me")
 async def delete_user_me(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     await current_user.delete()
+    # Remove the user's sessions, analyses and roadmaps after responding
+    background_tasks.add_task(purge_user_data, str(current_user.id))
     return {"message": "User deleted successfully"}
\ No newline at end of file
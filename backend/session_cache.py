@@ -0,0 +1,193 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+from beanie.operators import Push, Inc, Set, Unset
+
+from models import InterviewSession, InterviewMessage
+
+# Maximum number of sessions kept in memory before LRU eviction
+MAX_SESSIONS = int(os.getenv("INTERVIEW_CACHE_MAX_SESSIONS", "500"))
+# Upper bound in seconds on how long a new message waits before it is written to Mongo
+FLUSH_DELAY = float(os.getenv("INTERVIEW_CACHE_FLUSH_DELAY", "2.0"))
+# Pending messages that trigger an immediate flush
+FLUSH_BATCH_SIZE = int(os.getenv("INTERVIEW_CACHE_FLUSH_BATCH", "20"))
+
+
+class CachedSession:
+    """An active interview session held in memory, with its write-behind buffer."""
+
+    def __init__(self, session: InterviewSession):
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.flush_lock = asyncio.Lock()
+        self.pending: List[InterviewMessage] = []
+        self.flush_task: Optional[asyncio.Task] = None
+        self.last_used = time.monotonic()
+        # Live connections (WebSockets) holding this entry; pinned entries are never evicted
+        self.refs = 0
+
+
+class InterviewSessionCache:
+    """
+    In-process cache of active interview sessions.
+
+    Turns on the same session are serialized through a per-session lock. New
+    messages are appended in memory and written behind to Mongo in batches,
+    at most FLUSH_DELAY seconds later. Idle sessions are evicted LRU-first after
+    their pending messages are flushed. A session pinned by a live connection
+    is never evicted, even if that leaves the cache above max_sessions;
+    otherwise a later request would load a second copy whose history drifts
+    from the connection's. The cache is per worker, so a session's
+    turns should be routed to one worker (sticky sessions) when running several.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, flush_delay: float = FLUSH_DELAY,
+                 batch_size: int = FLUSH_BATCH_SIZE):
+        self.max_sessions = max_sessions
+        self.flush_delay = flush_delay
+        self.batch_size = batch_size
+        self._entries: "OrderedDict[str, CachedSession]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "messages": 0, "flushes": 0, "evictions": 0}
+
+    def peek(self, session_id: str) -> Optional[CachedSession]:
+        """Returns the cached entry without loading it from Mongo."""
+        return self._entries.get(session_id)
+
+    async def get(self, session_id: str, pin: bool = False) -> Optional[CachedSession]:
+        """
+        Returns the cached session, loading it from Mongo on a miss.
+        Args:
+            pin (bool): Keep the entry in memory until release() is called, e.g. for the life of a WebSocket.
+        """
+        entry = self._entries.get(session_id)
+        if entry:
+            self.stats["hits"] += 1
+            self._entries.move_to_end(session_id)
+            entry.last_used = time.monotonic()
+            if pin:
+                entry.refs += 1
+            return entry
+
+        self.stats["misses"] += 1
+        if not PydanticObjectId.is_valid(session_id):
+            return None
+        session = await InterviewSession.get(session_id)
+        if not session:
+            return None
+        # Another coroutine may have loaded it while we were waiting on Mongo
+        entry = self._entries.setdefault(session_id, CachedSession(session))
+        self._entries.move_to_end(session_id)
+        if pin:
+            entry.refs += 1
+        await self._evict()
+        return entry
+
+    def release(self, entry: CachedSession):
+        """Unpins an entry returned by get(pin=True)."""
+        entry.refs -= 1
+        entry.last_used = time.monotonic()
+
+    def append(self, entry: CachedSession, message: InterviewMessage):
+        """Appends a message in memory and schedules it to be written behind."""
+        entry.session.messages.append(message)
+        entry.pending.append(message)
+        entry.last_used = time.monotonic()
+        self.stats["messages"] += 1
+        if len(entry.pending) >= self.batch_size:
+            self._schedule(entry, 0)
+        elif entry.flush_task is None:
+            self._schedule(entry, self.flush_delay)
+
+    def _schedule(self, entry: CachedSession, delay: float):
+        if entry.flush_task is not None and not entry.flush_task.done():
+            if delay > 0:
+                return
+            entry.flush_task.cancel()
+        entry.flush_task = asyncio.create_task(self._flush_later(entry, delay))
+
+    async def _flush_later(self, entry: CachedSession, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        # Past this point the task is no longer cancelled by _schedule/flush_all
+        entry.flush_task = None
+        await self.flush(entry)
+
+    async def flush(self, entry: CachedSession):
+        """Writes all pending messages of a session with a single $push."""
+        # Serialize flushes so batches land in Mongo in order
+        async with entry.flush_lock:
+            if not entry.pending:
+                return
+            batch, entry.pending = entry.pending, []
+            now = datetime.utcnow()
+            updates = [
+                Push({InterviewSession.messages: {"$each": batch}}),
+                Inc({InterviewSession.version: 1}),
+                Set({InterviewSession.updated_at: now})
+            ]
+            if entry.session.is_active:
+                # A session that just took a turn is not abandoned, even if a retention
+                # sweep on another worker closed it; keep the TTL index off it
+                updates.append(Unset({InterviewSession.expires_at: 1}))
+            try:
+                await InterviewSession.find_one(InterviewSession.id == entry.session.id).update(*updates)
+            except Exception as e:
+                print(f"Error flushing interview session {entry.session.id}: {e}")
+                entry.pending = batch + entry.pending
+                if entry.flush_task is None:
+                    self._schedule(entry, self.flush_delay)
+                return
+            entry.session.version += 1
+            entry.session.updated_at = now
+            self.stats["flushes"] += 1
+
+    async def flush_all(self):
+        """Flushes every dirty session; called on shutdown."""
+        for entry in list(self._entries.values()):
+            if entry.flush_task is not None and not entry.flush_task.done():
+                entry.flush_task.cancel()
+            entry.flush_task = None
+            await self.flush(entry)
+
+    async def flush_user(self, user_id: str):
+        """Flushes the dirty sessions of one user, e.g. before exporting their history."""
+        for entry in list(self._entries.values()):
+            if entry.session.user_id == user_id:
+                await self.flush(entry)
+
+    def in_use(self, idle_seconds: float) -> List[str]:
+        """Ids of cached sessions used within idle_seconds or held by a connection or turn."""
+        now = time.monotonic()
+        return [
+            sid for sid, e in self._entries.items()
+            if e.refs or e.lock.locked() or now - e.last_used < idle_seconds
+        ]
+
+    def mark_closed(self, session_ids: List[str], expires_at: datetime):
+        """Mirrors a retention close onto cached copies so they stop accepting turns."""
+        for sid in session_ids:
+            entry = self._entries.get(sid)
+            if entry:
+                entry.session.is_active = False
+                entry.session.expires_at = expires_at
+                entry.session.version += 1
+
+    async def _evict(self):
+        while len(self._entries) > self.max_sessions:
+            # Skip sessions with a turn in progress or a live connection
+            victim = next((sid for sid, e in self._entries.items() if not e.lock.locked() and not e.refs), None)
+            if victim is None:
+                return
+            entry = self._entries.pop(victim)
+            if entry.flush_task is not None and not entry.flush_task.done():
+                entry.flush_task.cancel()
+            await self.flush(entry)
+            self.stats["evictions"] += 1
+
+
+session_cache = InterviewSessionCache()
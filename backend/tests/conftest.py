@@ -0,0 +1,46 @@
+import os
+
+# The agents build their Gemini clients at import time
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+import httpx
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from auth import create_access_token
+from models import User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """Fresh in-memory database with every document model registered."""
+    database = AsyncMongoMockClient().career_navigator_test
+    await init_beanie(
+        database=database,
+        document_models=[User, UserRoadmap, InterviewSession, ResumeAnalysis, ArchivedAnalysis]
+    )
+    return database
+
+
+@pytest.fixture
+async def client(db):
+    """HTTP client for the app. The lifespan is not run, so no real Mongo or background tasks."""
+    from main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def make_user(db):
+    """Creates a user and returns it with its Authorization header."""
+    async def factory(email: str = "user@example.com"):
+        user = User(email=email, name="Test User", hashed_password="not-used")
+        await user.insert()
+        return user, {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    return factory
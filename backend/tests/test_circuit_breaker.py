@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import guidance_agent
+from ai_schema.schema import CareerRoadmap, RoadmapStep
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CircuitOpen, CLOSED, OPEN, HALF_OPEN
+
+ROADMAP = CareerRoadmap(role="Data Engineer", steps=[
+    RoadmapStep(step_title=f"Step {i}", description="Practice.", estimated_duration="1 week") for i in range(3)
+])
+
+
+def isolated(name="test", **kwargs) -> CircuitBreaker:
+    """A breaker left out of the /health registry."""
+    breaker = CircuitBreaker(name, **kwargs)
+    circuit_breaker.breakers.pop(name)
+    return breaker
+
+
+def fail():
+    raise RuntimeError("model error")
+
+
+def trip(breaker: CircuitBreaker):
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+
+
+def expire(breaker: CircuitBreaker):
+    """Ends the open period now, so the next call is a half-open probe."""
+    breaker._opened_at -= breaker.open_seconds
+
+
+def test_opens_at_the_failure_rate_once_min_calls_are_reached():
+    breaker = isolated(failure_rate=0.5, window=10, min_calls=4)
+    trip(breaker)
+    trip(breaker)
+    breaker.call(lambda: None)
+    # Two failures out of three, but fewer than min_calls so far
+    assert breaker.snapshot()["state"] == CLOSED
+
+    breaker.call(lambda: None)
+
+    assert breaker.snapshot()["state"] == OPEN
+    ran = []
+    with pytest.raises(CircuitOpen) as rejected:
+        breaker.call(ran.append, 1)
+    assert ran == []
+    assert 1 <= rejected.value.retry_after <= breaker.open_seconds
+
+
+def test_slow_calls_count_as_failures():
+    breaker = isolated(min_calls=1, slow_call_seconds=0.01)
+
+    def slow():
+        time.sleep(0.02)
+        return "late"
+
+    # The slow call's result is still returned
+    assert breaker.call(slow) == "late"
+
+    assert breaker.snapshot()["state"] == OPEN
+    assert breaker.stats["failed"] == 1
+
+
+def test_half_open_admits_only_the_allowed_probes():
+    breaker = isolated(min_calls=1, half_open_probes=1)
+    trip(breaker)
+    expire(breaker)
+
+    with breaker.guard():
+        assert breaker.snapshot()["state"] == HALF_OPEN
+        with pytest.raises(CircuitOpen):
+            breaker.call(lambda: None)
+
+    assert breaker.snapshot()["state"] == CLOSED
+
+
+@pytest.mark.parametrize("probe, state, opened", [(lambda: None, CLOSED, 1), (fail, OPEN, 2)])
+def test_probe_closes_or_reopens_the_breaker(probe, state, opened):
+    breaker = isolated(min_calls=1)
+    trip(breaker)
+    expire(breaker)
+
+    try:
+        breaker.call(probe)
+    except RuntimeError:
+        pass
+
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == state
+    assert snapshot["opened"] == opened
+    # Closing starts from a clean window
+    assert snapshot["recent_calls"] == (0 if state == CLOSED else 1)
+
+
+def test_cancelled_probe_is_released_without_counting():
+    breaker = isolated(min_calls=1, half_open_probes=1)
+    trip(breaker)
+    expire(breaker)
+
+    with pytest.raises(asyncio.CancelledError):
+        with breaker.guard():
+            raise asyncio.CancelledError()
+
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    assert breaker.stats["failed"] == 1
+    # The probe slot is free again
+    breaker.call(lambda: None)
+    assert breaker.snapshot()["state"] == CLOSED
+
+
+@pytest.mark.anyio
+async def test_health_reports_each_circuit(client, monkeypatch):
+    breaker = isolated("health_test", min_calls=1)
+    monkeypatch.setitem(circuit_breaker.breakers, breaker.name, breaker)
+    trip(breaker)
+
+    body = (await client.get("/health")).json()
+
+    assert body["status"] == "degraded"
+    assert body["circuits"]["health_test"] == {
+        "state": OPEN, "failure_rate": 1.0, "recent_calls": 1, "failed": 1, "opened": 1
+    }
+
+
+class FakeRoadmapLLM:
+    """Answers with ROADMAP, or raises error when it is set."""
+
+    def __init__(self):
+        self.error = None
+
+    def with_structured_output(self, schema):
+        def respond(_):
+            if self.error:
+                raise self.error
+            return ROADMAP if schema is CareerRoadmap else ROADMAP.model_dump()
+        return RunnableLambda(respond)
+
+
+@pytest.fixture
+def roadmap_llm(monkeypatch):
+    llm = FakeRoadmapLLM()
+    monkeypatch.setattr(guidance_agent, "llm", llm)
+    monkeypatch.setattr(guidance_agent, "guidance_breaker", isolated("guidance_test", min_calls=1000))
+    monkeypatch.setattr(guidance_agent, "_roadmap_cache", OrderedDict())
+    return llm
+
+
+async def collect(job_role: str):
+    return [item async for item in guidance_agent.stream_roadmap(job_role)]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error", [RuntimeError("model error"), CircuitOpen("guidance_test", 30)])
+async def test_both_generators_serve_the_cached_roadmap_on_a_model_error(roadmap_llm, error):
+    assert guidance_agent.generate_roadmap("Data Engineer") == ROADMAP
+    roadmap_llm.error = error
+
+    assert guidance_agent.generate_roadmap(" data engineer ") == ROADMAP
+    assert await collect("Data Engineer") == ROADMAP.steps + [ROADMAP]
+
+
+@pytest.mark.anyio
+async def test_model_error_without_a_cached_roadmap(roadmap_llm):
+    roadmap_llm.error = RuntimeError("model error")
+    assert guidance_agent.generate_roadmap("Data Engineer") is None
+    with pytest.raises(RuntimeError):
+        await collect("Data Engineer")
+
+    roadmap_llm.error = CircuitOpen("guidance_test", 30)
+    with pytest.raises(CircuitOpen):
+        guidance_agent.generate_roadmap("Data Engineer")
+    with pytest.raises(CircuitOpen):
+        await collect("Data Engineer")
+
+
+@pytest.mark.anyio
+async def test_open_circuit_answers_503_with_retry_after(client, make_user, monkeypatch):
+    breaker = isolated("guidance_503", min_calls=1)
+    trip(breaker)
+    monkeypatch.setattr(guidance_agent, "guidance_breaker", breaker)
+    monkeypatch.setattr(guidance_agent, "_roadmap_cache", OrderedDict())
+    _, headers = await make_user()
+
+    response = await client.post("/guidance/generate", json={"job_role": "Data Engineer"}, headers=headers)
+
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["Retry-After"]) <= breaker.open_seconds
+    assert "temporarily unavailable" in response.json()["detail"]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from models import InterviewSession, InterviewMessage, ResumeAnalysis, UserRoadmap, UserRoadmapStep
+
+pytestmark = pytest.mark.anyio
+
+
+def roadmap(user_id: str, statuses, is_active: bool = True) -> UserRoadmap:
+    return UserRoadmap(user_id=user_id, role="Data Engineer", is_active=is_active, steps=[
+        UserRoadmapStep(title=f"Step {i}", description="Practice.", estimated_duration="1 week",
+                        status=status, order_index=i) for i, status in enumerate(statuses)
+    ])
+
+
+def without_dates(items):
+    for item in items:
+        assert datetime.fromisoformat(item.pop("created_at"))
+    return items
+
+
+async def test_dashboard_payload_shape(client, make_user):
+    user, headers = await make_user()
+    user_id = str(user.id)
+    await roadmap(user_id, ["done"] * 4, is_active=False).insert()
+    active = roadmap(user_id, ["done", "done", "in_progress", "todo", "todo", "todo"])
+    await active.insert()
+    old = ResumeAnalysis(user_id=user_id, filename="old.pdf",
+                         analysis_data={"analysis": {"score": 55, "identified_domain": "Data Analyst"}},
+                         created_at=datetime.utcnow() - timedelta(days=retention.ARCHIVE_AFTER_DAYS + 1))
+    await old.insert()
+    await retention.archive_old_analyses()
+    new = ResumeAnalysis(user_id=user_id, filename="new.pdf", analysis_data={})
+    await new.insert()
+    talked = InterviewSession(user_id=user_id, job_role="Data Engineer",
+                              messages=[InterviewMessage(sender="ai", content="Hello")],
+                              created_at=datetime.utcnow() - timedelta(hours=1))
+    await talked.insert()
+    empty = InterviewSession(user_id=user_id, job_role="ML Engineer", is_active=False)
+    await empty.insert()
+
+    response = await client.get("/users/me/dashboard", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body.keys() == {"user", "roadmap", "analyses", "sessions"}
+    assert body["user"] == {"id": user_id, "email": user.email, "name": user.name}
+    assert body["roadmap"] == {"id": str(active.id), "role": "Data Engineer",
+                               "total": 6, "todo": 3, "in_progress": 1, "done": 2}
+    assert without_dates(body["analyses"]) == [
+        {"id": str(new.id), "filename": "new.pdf", "score": 0, "domain": "N/A", "archived": False},
+        {"id": str(old.id), "filename": "old.pdf", "score": 55, "domain": "Data Analyst", "archived": True},
+    ]
+    # Newest first, without messages, whether or not the session has any
+    assert without_dates(body["sessions"]) == [
+        {"id": str(empty.id), "job_role": "ML Engineer", "is_active": False},
+        {"id": str(talked.id), "job_role": "Data Engineer", "is_active": True},
+    ]
+
+
+async def test_dashboard_of_a_new_user_is_empty(client, make_user):
+    _, headers = await make_user()
+
+    body = (await client.get("/users/me/dashboard", headers=headers)).json()
+
+    assert body["roadmap"] is None
+    assert body["analyses"] == [] and body["sessions"] == []
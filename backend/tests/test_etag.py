@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from models import ResumeAnalysis, InterviewSession, InterviewMessage, UserRoadmap, UserRoadmapStep
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Names of the versioned documents fully loaded from Mongo; projections are not counted."""
+    names = []
+    for model in (ResumeAnalysis, InterviewSession, UserRoadmap):
+        original = model.model_validate
+
+        def spy(cls, *args, _original=original, **kwargs):
+            names.append(cls.__name__)
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(model, "model_validate", classmethod(spy))
+    return names
+
+
+@pytest.fixture
+async def polled_user(make_user):
+    user, headers = await make_user()
+    user_id = str(user.id)
+    analysis = ResumeAnalysis(
+        user_id=user_id,
+        filename="resume.pdf",
+        analysis_data={"analysis": {"score": 70, "identified_domain": "Data Engineer", "missing_skills": ["Spark"] * 50}},
+        resume_text="Experienced engineer. " * 200
+    )
+    await analysis.insert()
+    await InterviewSession(
+        user_id=user_id,
+        job_role="Data Engineer",
+        messages=[InterviewMessage(sender="ai", content="Tell me about a pipeline you built. " * 5) for _ in range(50)]
+    ).insert()
+    await UserRoadmap(
+        user_id=user_id,
+        role="Data Engineer",
+        steps=[
+            UserRoadmapStep(title=f"Step {i}", description="Learn it well. " * 20, estimated_duration="2 weeks", order_index=i)
+            for i in range(10)
+        ]
+    ).insert()
+    return headers, [
+        "/guidance/active",
+        "/career/history",
+        "/interview/sessions",
+        f"/career/analysis/{analysis.id}",
+    ]
+
+
+async def test_polled_endpoints_return_etags(client, polled_user):
+    headers, paths = polled_user
+    for path in paths:
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200, path
+        assert response.headers["ETag"].startswith('W/"'), path
+
+
+async def test_304_does_not_load_or_serialize_documents(client, polled_user, loaded):
+    headers, paths = polled_user
+    for path in paths:
+        first = await client.get(path, headers=headers)
+        assert loaded, f"{path} should load the document on a full response"
+        loaded.clear()
+
+        revalidated = await client.get(path, headers={**headers, "If-None-Match": first.headers["ETag"]})
+
+        assert revalidated.status_code == 304, path
+        assert revalidated.content == b"", path
+        assert revalidated.headers["ETag"] == first.headers["ETag"], path
+        assert loaded == [], f"{path} loaded {loaded} to answer 304"
+
+
+async def test_write_changes_the_etag(client, polled_user):
+    headers, _ = polled_user
+    first = await client.get("/guidance/active", headers=headers)
+    step_id = first.json()["steps"][0]["id"]
+
+    await client.patch(f"/guidance/steps/{step_id}", json={"status": "done"}, headers=headers)
+    after = await client.get("/guidance/active", headers={**headers, "If-None-Match": first.headers["ETag"]})
+
+    assert after.status_code == 200
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert after.json()["steps"][0]["status"] == "done"
+
+
+async def revalidate(client, path, headers):
+    first = await client.get(path, headers=headers)
+    again = await client.get(path, headers={**headers, "If-None-Match": first.headers["ETag"]})
+    return first, again
+
+
+async def test_no_active_roadmap_still_has_an_etag(client, make_user):
+    _, headers = await make_user()
+
+    first, again = await revalidate(client, "/guidance/active", headers)
+
+    assert first.status_code == 200 and first.json() is None
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+async def test_archived_analysis_has_an_etag(client, make_user, monkeypatch):
+    user, headers = await make_user()
+    old = ResumeAnalysis(user_id=str(user.id), filename="old.pdf",
+                         analysis_data={"analysis": {"score": 55, "identified_domain": "Data Analyst"}},
+                         created_at=datetime.utcnow() - timedelta(days=retention.ARCHIVE_AFTER_DAYS + 1))
+    await old.insert()
+    await retention.archive_old_analyses()
+    decompressed = []
+    monkeypatch.setattr("routes.career.career_routes.decompress_analysis",
+                        lambda item: decompressed.append(item) or retention.decompress_analysis(item))
+
+    first, again = await revalidate(client, f"/career/analysis/{old.id}", headers)
+
+    assert first.json()["analysis"]["score"] == 55
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert len(decompressed) == 1
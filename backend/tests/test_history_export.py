@@ -0,0 +1,73 @@
+import io
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import history_export
+from models import InterviewSession, InterviewMessage
+
+pytestmark = pytest.mark.anyio
+
+BACKEND = Path(__file__).resolve().parent.parent
+# Growth allowed on top of what reading the cursors costs; a buffered export of 10k messages adds several MiB
+EXPORT_OVERHEAD_KIB = 1024
+
+
+def measure_peak_rss(*modes):
+    """Runs benchmarks.export_memory in one fresh process per mode, in parallel."""
+    runs = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.export_memory", mode, "1000", "10"],
+                         cwd=BACKEND, stdout=subprocess.PIPE, text=True)
+        for mode in modes
+    ]
+    results = {}
+    for mode, run in zip(modes, runs):
+        out, _ = run.communicate(timeout=120)
+        assert run.returncode == 0, mode
+        result = json.loads(out.strip().splitlines()[-1])
+        assert result["messages"] == 10_000
+        results[mode] = result["peak_rss_growth_kib"]
+    return results
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="peak RSS is read with the resource module")
+def test_export_of_10k_messages_has_bounded_peak_rss():
+    peak = measure_peak_rss("drain", "ndjson", "zip", "naive")
+
+    assert peak["ndjson"] <= peak["drain"] + EXPORT_OVERHEAD_KIB, peak
+    assert peak["zip"] <= peak["drain"] + EXPORT_OVERHEAD_KIB, peak
+    # Loading every session at once must register, or the check above proves nothing
+    assert peak["naive"] > peak["drain"] + EXPORT_OVERHEAD_KIB, peak
+
+
+async def test_zip_has_one_ndjson_file_per_record_type(make_user):
+    user, _ = await make_user()
+    for i in range(3):
+        await InterviewSession(user_id=str(user.id), job_role="Data Engineer",
+                               messages=[InterviewMessage(sender="ai", content=f"Question {j}") for j in range(4)]).insert()
+
+    data = b"".join([chunk async for chunk in history_export.stream_zip(user)])
+
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.namelist() == ["profile.ndjson", "interview_sessions.ndjson", "interview_messages.ndjson"]
+    messages = archive.read("interview_messages.ndjson").decode().splitlines()
+    assert len(messages) == 12
+    assert json.loads(messages[0])["content"] == "Question 0"
+
+
+async def test_zip_stream_surfaces_the_original_error(make_user, monkeypatch):
+    user, _ = await make_user()
+
+    async def failing_records(user):
+        yield {"type": "user", "id": str(user.id)}
+        raise ConnectionError("cursor lost")
+
+    monkeypatch.setattr(history_export, "iter_user_records", failing_records)
+
+    with pytest.raises(ConnectionError, match="cursor lost"):
+        async for _ in history_export.stream_zip(user):
+            pass
@@ -0,0 +1,87 @@
+import anyio
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from main import app
+from session_cache import session_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_id(client, make_user):
+    _, headers = await make_user()
+    response = await client.post("/interview/sessions", json={"job_role": "Data Engineer"}, headers=headers)
+    return response.json()["id"], headers["Authorization"].removeprefix("Bearer ")
+
+
+def connect(path, first_frame):
+    """Opens the socket in a worker thread (TestClient runs its own loop) and returns the first reply."""
+    def run():
+        with TestClient(app).websocket_connect(path) as ws:
+            if first_frame is not None:
+                ws.send_json(first_frame)
+            return ws.receive_json()
+    return anyio.to_thread.run_sync(run)
+
+
+async def test_auth_frame_opens_the_session(session_id):
+    sid, token = session_id
+    reply = await connect(f"/interview/sessions/{sid}/ws", {"type": "auth", "token": token})
+    assert reply["type"] == "history"
+    assert reply["total"] == 1
+
+
+@pytest.mark.parametrize("frame", [
+    {"type": "auth", "token": "not-a-jwt"},
+    {"type": "message", "content": "hello"},
+])
+async def test_missing_or_bad_auth_frame_is_rejected(session_id, frame):
+    sid, _ = session_id
+    with pytest.raises(WebSocketDisconnect) as closed:
+        await connect(f"/interview/sessions/{sid}/ws", frame)
+    assert closed.value.code == 1008
+
+
+async def test_token_in_query_string_is_not_accepted(session_id, monkeypatch):
+    monkeypatch.setattr("routes.career.interview_routes.AUTH_TIMEOUT", 0.1)
+    sid, token = session_id
+    with pytest.raises(WebSocketDisconnect) as closed:
+        await connect(f"/interview/sessions/{sid}/ws?token={token}", None)
+    assert closed.value.code == 1008
+
+
+async def test_connection_pins_its_session_until_closed(session_id):
+    sid, token = session_id
+    pinned = []
+
+    def run():
+        with TestClient(app).websocket_connect(f"/interview/sessions/{sid}/ws") as ws:
+            ws.send_json({"type": "auth", "token": token})
+            ws.receive_json()
+            pinned.append(session_cache.peek(sid).refs)
+
+    await anyio.to_thread.run_sync(run)
+
+    assert pinned == [1]
+    assert session_cache.peek(sid).refs == 0
+
+
+async def test_malformed_frames_get_an_error_and_keep_the_socket_open(session_id):
+    sid, token = session_id
+
+    def run():
+        replies = []
+        with TestClient(app).websocket_connect(f"/interview/sessions/{sid}/ws") as ws:
+            ws.send_json({"type": "auth", "token": token})
+            ws.receive_json()
+            for send in (lambda: ws.send_text("{not json"), lambda: ws.send_json([1, 2]),
+                         lambda: ws.send_json("hi"), lambda: ws.send_bytes(b"\x00")):
+                send()
+                replies.append(ws.receive_json()["type"])
+            ws.send_json({"type": "ping"})
+            replies.append(ws.receive_json()["type"])
+        return replies
+
+    assert await anyio.to_thread.run_sync(run) == ["error"] * 4 + ["pong"]
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from utils import pdf_handler
+from utils.pdf_handler import PdfBackend, extract_text
+
+pytest.importorskip("reportlab")
+from benchmarks.pdf_backends import benchmark, make_corpus, single_column_pdf  # noqa: E402
+
+
+class EmptyBackend(PdfBackend):
+    """A backend that finds no text layer, like PyPDF2 on a scanned page."""
+    name = "empty"
+
+    def extract(self, data):
+        return ""
+
+
+def test_backend_without_extract_cannot_be_created():
+    class Incomplete(PdfBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_falls_back_when_a_backend_yields_too_little(monkeypatch):
+    monkeypatch.setitem(pdf_handler.BACKENDS, "empty", EmptyBackend())
+    data, _ = single_column_pdf(random.Random(1))
+
+    text, backend = extract_text(data, ["empty", "pypdf2"])
+
+    assert backend == "pypdf2"
+    assert "EXPERIENCE" in text
+
+
+def test_generated_corpus_separates_the_backends():
+    results = benchmark(make_corpus(4), ["pypdf2", "pdfminer"])
+
+    assert results["pdfminer"]["sections_intact"] == "100.0%"
+    # Row-by-row two-column pages are what PyPDF2 mixes up
+    assert results["pypdf2"]["sections_intact"] != "100.0%"
+    assert all(r["failures"] == 0 for r in results.values())
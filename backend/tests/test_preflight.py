@@ -0,0 +1,88 @@
+import io
+import random
+from collections import Counter
+
+import pytest
+
+from utils import pdf_handler, preflight
+from utils.pdf_handler import PdfBackend
+from utils.preflight import PreflightError, check_upload
+
+pytest.importorskip("reportlab")
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from benchmarks.pdf_backends import _Column, _render, single_column_pdf, two_column_pdf  # noqa: E402
+
+PROSE = "The committee reviewed the quarterly figures and agreed to revisit the budget in spring."
+
+
+def prose_pdf(lines: int) -> bytes:
+    column = _Column(x=60)
+    for _ in range(lines):
+        column.line(PROSE)
+    return _render(column)
+
+
+def blank_pdf() -> bytes:
+    """A page with a drawing but no text layer, like a scanned resume."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.rect(50, 50, 400, 600, fill=1)
+    pdf.save()
+    return buffer.getvalue()
+
+
+class RecordingBackend(PdfBackend):
+    name = "pdfminer"
+
+    def __init__(self):
+        self.calls = 0
+
+    def extract(self, data):
+        self.calls += 1
+        return ""
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    counter = Counter()
+    monkeypatch.setattr(preflight, "stats", counter)
+    return counter
+
+
+@pytest.mark.parametrize("contents, reason", [
+    (b"name,email\nJane,jane@example.com\n", "not_pdf"),
+    (b"%PDF-1.4 but nothing else", "unreadable"),
+    (prose_pdf(60), "too_many_pages"),
+    (blank_pdf(), "no_text"),
+    (prose_pdf(10), "not_resume"),
+])
+def test_rejects_with_a_reason(monkeypatch, stats, contents, reason):
+    monkeypatch.setattr(preflight, "MAX_PAGES", 1)
+
+    with pytest.raises(PreflightError) as rejected:
+        check_upload(contents)
+
+    assert rejected.value.reason == reason
+    assert stats == {"checked": 1, f"rejected_{reason}": 1}
+
+
+def test_accepts_a_resume(stats):
+    data, _ = single_column_pdf(random.Random(1))
+
+    check_upload(data)
+
+    assert stats == {"checked": 1, "accepted": 1}
+
+
+def test_text_layer_is_measured_with_the_fast_backend_only(monkeypatch):
+    layout = RecordingBackend()
+    monkeypatch.setitem(pdf_handler.BACKENDS, "pdfminer", layout)
+    data, _ = two_column_pdf(random.Random(2))
+
+    check_upload(data)
+    with pytest.raises(PreflightError):
+        check_upload(blank_pdf())
+
+    # Not even for a PDF without a text layer, where the fallback chain would try it
+    assert layout.calls == 0
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils import rate_limit
+from utils.rate_limit import FairScheduler, InMemoryBackend, RateLimitBackend, check_rate_limit, set_backend
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A fresh in-memory backend, with the previous one restored afterwards."""
+    monkeypatch.setattr(rate_limit, "_backend", rate_limit._backend)
+    fresh = InMemoryBackend()
+    set_backend(fresh)
+    return fresh
+
+
+async def test_token_bucket_allows_the_burst_then_refills(clock):
+    bucket = InMemoryBackend()
+
+    assert [await bucket.take("u1", rate=1.0, capacity=2) for _ in range(2)] == [0.0, 0.0]
+    assert await bucket.take("u1", rate=1.0, capacity=2) == pytest.approx(1.0)
+    # Other keys have buckets of their own
+    assert await bucket.take("u2", rate=1.0, capacity=2) == 0.0
+
+    clock.now += 0.5
+    assert await bucket.take("u1", rate=1.0, capacity=2) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert await bucket.take("u1", rate=1.0, capacity=2) == 0.0
+
+
+async def hold(scheduler: FairScheduler, user_id: str, admitted: list, release: asyncio.Event = None):
+    async with scheduler.slot(user_id):
+        admitted.append(user_id)
+        if release:
+            await release.wait()
+
+
+async def queue(scheduler: FairScheduler, *user_ids: str, admitted: list):
+    """Starts a task per user id, each waiting in the queue in the given order."""
+    tasks = []
+    for user_id in user_ids:
+        tasks.append(asyncio.create_task(hold(scheduler, user_id, admitted)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def test_freed_slots_go_round_robin_across_users():
+    scheduler = FairScheduler(max_concurrent=1, max_queued=10, max_queued_per_user=3)
+    admitted, release = [], asyncio.Event()
+    holder = asyncio.create_task(hold(scheduler, "holder", admitted, release))
+    await asyncio.sleep(0)
+    tasks = await queue(scheduler, "a", "a", "a", "b", "c", admitted=admitted)
+
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+    assert admitted == ["holder", "a", "b", "c", "a", "a"]
+    assert scheduler.stats == {"admitted": 6, "queued": 5, "shed": 0}
+
+
+@pytest.mark.parametrize("limits, queued, shed_user", [
+    ({"max_queued": 2, "max_queued_per_user": 2}, ["a", "b"], "c"),
+    ({"max_queued": 10, "max_queued_per_user": 1}, ["a", "b"], "a"),
+])
+async def test_full_queue_sheds_with_retry_after(limits, queued, shed_user):
+    scheduler = FairScheduler(max_concurrent=1, **limits)
+    admitted, release = [], asyncio.Event()
+    holder = asyncio.create_task(hold(scheduler, "holder", admitted, release))
+    await asyncio.sleep(0)
+    tasks = await queue(scheduler, *queued, admitted=admitted)
+
+    with pytest.raises(HTTPException) as shed:
+        async with scheduler.slot(shed_user):
+            pass
+
+    assert shed.value.status_code == 429
+    # Average hold time 5 s, times the two queued requests plus this one, over one slot
+    assert shed.value.headers["Retry-After"] == "15"
+    assert scheduler.stats["shed"] == 1
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler(max_concurrent=1)
+    admitted, release = [], asyncio.Event()
+    holder = asyncio.create_task(hold(scheduler, "holder", admitted, release))
+    await asyncio.sleep(0)
+    gone, waiting = await queue(scheduler, "a", "b", admitted=admitted)
+
+    gone.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, waiting)
+
+    assert admitted == ["holder", "b"]
+    assert (scheduler._active, scheduler._queued) == (0, 0)
+
+
+async def test_slot_handed_to_a_cancelled_waiter_passes_on():
+    scheduler = FairScheduler(max_concurrent=1)
+    admitted = []
+    holder = scheduler.slot("holder")
+    await holder.__aenter__()
+    handed, waiting = await queue(scheduler, "a", "b", admitted=admitted)
+
+    # The slot is handed to "a", which is cancelled before it gets to run
+    await holder.__aexit__(None, None, None)
+    handed.cancel()
+    # Bounded, since a slot lost with the cancelled waiter would leave "b" waiting forever
+    await asyncio.wait_for(asyncio.gather(handed, waiting, return_exceptions=True), timeout=1)
+
+    assert admitted == ["b"]
+    assert (scheduler._active, scheduler._queued) == (0, 0)
+
+
+class DenyingBackend(RateLimitBackend):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        self.keys = []
+
+    async def take(self, key, rate, capacity):
+        self.keys.append(key)
+        return self.retry_after
+
+
+async def test_set_backend_replaces_the_storage(backend):
+    stub = DenyingBackend(7.2)
+    set_backend(stub)
+
+    with pytest.raises(HTTPException) as limited:
+        await check_rate_limit("guidance_quiz", "u1")
+
+    assert stub.keys == ["guidance_quiz:u1"]
+    assert limited.value.status_code == 429
+    assert limited.value.headers["Retry-After"] == "8"
+
+
+async def test_chat_over_the_limit_gets_429_with_retry_after(client, make_user, backend, monkeypatch):
+    monkeypatch.setattr("routes.career.interview_routes.generate_interview_response", lambda role, history: "Next?")
+    _, headers = await make_user()
+    sid = (await client.post("/interview/sessions", json={"job_role": "Data Engineer"}, headers=headers)).json()["id"]
+    rate, burst = rate_limit.LIMITS["interview_chat"]
+
+    statuses = []
+    for _ in range(int(burst) + 1):
+        response = await client.post(f"/interview/sessions/{sid}/chat", json={"message": "Hi"}, headers=headers)
+        statuses.append(response.status_code)
+
+    assert statuses == [200] * int(burst) + [429]
+    assert int(response.headers["Retry-After"]) == pytest.approx(1 / rate, abs=1)
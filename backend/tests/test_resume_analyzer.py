@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import re
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import resume_analyzer
+from ai_schema.schema import JobAnalysisResult, ResumeSectionSkills, SectionSkills, Skills
+from models import ResumeAnalysis
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CircuitOpen
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 555 010 2030
+SKILLS
+Python, SQL, Airflow, Spark
+EXPERIENCE
+Data Engineer, Acme Corp (2020 - 2023)
+Built batch pipelines moving 2 TB a day into the warehouse.
+EDUCATION
+B.Sc. Computer Science, State University
+2019
+"""
+
+
+class FakeLLM:
+    """Records each structured-output call and answers per labelled section."""
+
+    def __init__(self, skip_sections=()):
+        self.calls = []
+        self.skip_sections = set(skip_sections)
+        self.extraction_down = False
+        self.analysis_down = False
+        self.delay = 0
+
+    def with_structured_output(self, schema):
+        def respond(prompt_value):
+            text = prompt_value.to_string()
+            self.calls.append((schema.__name__, text))
+            time.sleep(self.delay)
+            # Not retried by the graph, so the run stops at once at its last checkpoint
+            if schema is ResumeSectionSkills and self.extraction_down:
+                raise CircuitOpen("extraction", 30)
+            if schema is JobAnalysisResult and self.analysis_down:
+                raise CircuitOpen("analysis", 30)
+            if schema is ResumeSectionSkills:
+                labels = re.findall(r'^=== (\w+) ===$', text, re.MULTILINE)
+                return ResumeSectionSkills(sections=[
+                    SectionSkills(section=label, skills=Skills(
+                        all_skills=[{"skill_name": f"{label} skill", "type": "technical"}],
+                        all_contacts=None, all_education=None, all_experience=None
+                    )) for label in labels if label not in self.skip_sections
+                ])
+            return JobAnalysisResult(identified_domain="Data Engineer", score=72,
+                                     missing_skills=["Kafka"], recommended_courses=["Streaming 101"])
+        return RunnableLambda(respond)
+
+    def calls_for(self, schema):
+        return [text for name, text in self.calls if name == schema.__name__]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(resume_analyzer, "llm", llm)
+    # A breaker of its own, so failures here do not open the shared one
+    breaker = CircuitBreaker("resume_analyzer_test", min_calls=1000)
+    circuit_breaker.breakers.pop(breaker.name)
+    monkeypatch.setattr(resume_analyzer, "resume_breaker", breaker)
+    return llm
+
+
+def analyze(text, previous=None):
+    return resume_analyzer.invoke_agent("resume.pdf", previous_sections=previous, raw_text=text)
+
+
+def as_previous(result):
+    return {s["name"]: {"hash": s["hash"], "extraction": s["extraction"]} for s in result["sections"]}
+
+
+def test_first_upload_extracts_all_sections_in_one_call(fake_llm):
+    result = analyze(RESUME)
+
+    extraction_calls = fake_llm.calls_for(ResumeSectionSkills)
+    assert len(extraction_calls) == 1
+    assert len(fake_llm.calls_for(JobAnalysisResult)) == 1
+    for name in ("header", "skills", "experience", "education"):
+        assert f"=== {name} ===" in extraction_calls[0]
+    sections = {s["name"]: s["extraction"] for s in result["sections"]}
+    assert sections["skills"]["all_skills"][0]["skill_name"] == "skills skill"
+    assert result["analysis"]["score"] == 72
+
+
+def test_revised_upload_extracts_only_changed_sections(fake_llm):
+    first = analyze(RESUME)
+    fake_llm.calls.clear()
+
+    revised = RESUME.replace("2 TB a day", "5 TB a day")
+    second = analyze(revised, as_previous(first))
+
+    extraction_calls = fake_llm.calls_for(ResumeSectionSkills)
+    assert len(extraction_calls) == 1
+    assert re.findall(r'^=== (\w+) ===$', extraction_calls[0], re.MULTILINE) == ["experience"]
+    before = {s["name"]: s for s in first["sections"]}
+    for section in second["sections"]:
+        if section["name"] != "experience":
+            assert section == before[section["name"]]
+    assert second["extracted_skills"]["all_skills"]
+
+
+def test_unchanged_upload_makes_no_extraction_call(fake_llm):
+    first = analyze(RESUME)
+    fake_llm.calls.clear()
+
+    analyze(RESUME, as_previous(first))
+
+    assert fake_llm.calls_for(ResumeSectionSkills) == []
+    assert len(fake_llm.calls_for(JobAnalysisResult)) == 1
+
+
+def test_section_skipped_by_the_model_is_extracted_again_next_time(fake_llm):
+    fake_llm.skip_sections = {"education"}
+    first = analyze(RESUME)
+    assert {s["name"]: s["extraction"] for s in first["sections"]}["education"] is None
+
+    fake_llm.skip_sections = set()
+    fake_llm.calls.clear()
+    analyze(RESUME, as_previous(first))
+
+    extraction_calls = fake_llm.calls_for(ResumeSectionSkills)
+    assert re.findall(r'^=== (\w+) ===$', extraction_calls[0], re.MULTILINE) == ["education"]
+
+
+def fail_run(run_id):
+    with pytest.raises(resume_analyzer.AnalysisRunFailed):
+        resume_analyzer.invoke_agent("resume.pdf", raw_text=RESUME, run_id=run_id)
+
+
+def test_failed_run_resumes_without_unregistered_type_warning(fake_llm, caplog):
+    fake_llm.analysis_down = True
+    fail_run("resumable")
+    assert resume_analyzer.run_status("resumable")["nodes"]["analyzer"] == "failed"
+
+    fake_llm.analysis_down = False
+    with caplog.at_level(logging.WARNING):
+        result = resume_analyzer.resume_agent("resumable")
+
+    assert result["analysis"]["score"] == 72
+    assert "unregistered type" not in caplog.text
+    assert resume_analyzer.run_status("resumable") is None
+
+
+def test_failed_run_checkpoints_expire(fake_llm, monkeypatch):
+    fake_llm.analysis_down = True
+    fail_run("abandoned")
+    assert resume_analyzer.run_status("abandoned") is not None
+
+    monkeypatch.setattr(resume_analyzer, "FAILED_RUN_TTL", 0)
+    fail_run("later")
+
+    assert resume_analyzer.run_status("abandoned") is None
+
+
+def test_failed_run_checkpoints_are_bounded(fake_llm, monkeypatch):
+    monkeypatch.setattr(resume_analyzer, "MAX_FAILED_RUNS", 2)
+    fake_llm.analysis_down = True
+    for run_id in ("first", "second", "third"):
+        fail_run(run_id)
+
+    assert resume_analyzer.run_status("first") is None
+    assert resume_analyzer.run_status("second") is not None
+    assert resume_analyzer.run_status("third") is not None
+
+
+def fail_owned_run(run_id, user):
+    with pytest.raises(resume_analyzer.AnalysisRunFailed):
+        resume_analyzer.invoke_agent("resume.pdf", raw_text=RESUME, run_id=run_id,
+                                     metadata={"user_id": str(user.id), "filename": "cv.pdf"})
+
+
+@pytest.mark.anyio
+async def test_run_stays_owned_across_failed_resumes(fake_llm, client, make_user):
+    user, headers = await make_user()
+    fake_llm.extraction_down = fake_llm.analysis_down = True
+    fail_owned_run("twice", user)
+
+    # The extractor recovers, the analyzer is still down
+    fake_llm.extraction_down = False
+    partial = await client.post("/career/runs/twice/resume", headers=headers)
+    assert partial.status_code == 503
+    assert partial.json()["detail"]["nodes"] == {"reader": "done", "ai_extractor": "done", "analyzer": "failed"}
+    status = await client.get("/career/runs/twice", headers=headers)
+    assert status.status_code == 200
+
+    fake_llm.analysis_down = False
+    done = await client.post("/career/runs/twice/resume", headers=headers)
+    assert done.status_code == 200
+    assert (await ResumeAnalysis.get(done.json()["id"])).filename == "cv.pdf"
+
+
+@pytest.mark.anyio
+async def test_concurrent_resumes_of_one_run_are_rejected(fake_llm, client, make_user):
+    user, headers = await make_user()
+    fake_llm.analysis_down = True
+    fail_owned_run("contended", user)
+    fake_llm.analysis_down, fake_llm.delay = False, 0.3
+
+    responses = await asyncio.gather(*[client.post("/career/runs/contended/resume", headers=headers) for _ in range(2)])
+
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    assert await ResumeAnalysis.find(ResumeAnalysis.user_id == str(user.id)).count() == 1
@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.resume_sections import compact_resume, estimate_tokens, split_sections
+
+FIXTURES = Path(__file__).parent / "fixtures" / "resumes"
+EXPECTED = json.loads((FIXTURES / "expected.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(params=sorted(EXPECTED))
+def resume(request):
+    return (FIXTURES / request.param).read_text(encoding="utf-8"), EXPECTED[request.param]
+
+
+def test_sections_are_detected(resume):
+    text, expected = resume
+    assert list(split_sections(text)) == expected["sections"]
+
+
+def test_compaction_keeps_the_facts_extraction_relies_on(resume):
+    text, expected = resume
+    sections, _ = compact_resume(text)
+    for name, facts in expected["kept"].items():
+        for fact in facts:
+            assert fact in sections[name], f"{fact!r} lost from {name}"
+
+
+def test_compaction_drops_boilerplate(resume):
+    text, expected = resume
+    _, prompt_text = compact_resume(text)
+    for line in expected["dropped"]:
+        assert line not in prompt_text, f"{line!r} reached the prompt"
+    assert estimate_tokens(prompt_text) < estimate_tokens(text)
+
+
+def test_bare_page_numbers_are_dropped_but_years_and_phones_kept():
+    sections = split_sections("Jane Doe\n5550102030\nEDUCATION\nBSc Physics\n2019\n3\n")
+    assert sections == {"header": "Jane Doe 5550102030", "education": "BSc Physics 2019"}
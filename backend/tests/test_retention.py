@@ -0,0 +1,87 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from models import InterviewSession, InterviewMessage, ResumeAnalysis
+from session_cache import session_cache
+
+pytestmark = pytest.mark.anyio
+
+LONG_AGO = datetime.utcnow() - timedelta(days=retention.SESSION_IDLE_DAYS + 1)
+
+
+async def idle_session(user_id: str) -> str:
+    """A session whose last write in Mongo is older than the idle cutoff."""
+    session = InterviewSession(user_id=user_id, job_role="Data Engineer",
+                               messages=[InterviewMessage(sender="ai", content="Hello")])
+    await session.insert()
+    await InterviewSession.get_motor_collection().update_one(
+        {"_id": session.id}, {"$set": {"updated_at": LONG_AGO}}
+    )
+    return str(session.id)
+
+
+async def test_cached_copy_of_an_expired_session_stops_accepting_turns(client, make_user):
+    user, headers = await make_user()
+    sid = await idle_session(str(user.id))
+    entry = await session_cache.get(sid)
+    entry.last_used = time.monotonic() - retention.SESSION_IDLE_DAYS * 86400 - 1
+
+    assert await retention.expire_abandoned_sessions() == 1
+
+    assert entry.session.is_active is False
+    response = await client.post(f"/interview/sessions/{sid}/chat", json={"message": "Hi"}, headers=headers)
+    assert response.status_code == 400
+
+
+async def test_session_in_use_in_the_cache_is_not_expired(make_user):
+    user, _ = await make_user()
+    sid = await idle_session(str(user.id))
+    # The user came back: the session is cached but the turn is not written behind yet
+    entry = await session_cache.get(sid)
+
+    assert await retention.expire_abandoned_sessions() == 0
+    assert entry.session.is_active is True
+    assert (await InterviewSession.get(sid)).expires_at is None
+
+
+async def test_flush_of_an_active_session_clears_expires_at(make_user):
+    user, _ = await make_user()
+    sid = await idle_session(str(user.id))
+    entry = await session_cache.get(sid)
+    # Closed in Mongo by a sweep that did not see this worker's cache
+    await InterviewSession.get_motor_collection().update_one(
+        {"_id": entry.session.id}, {"$set": {"expires_at": datetime.utcnow() + timedelta(days=30)}}
+    )
+
+    session_cache.append(entry, InterviewMessage(sender="user", content="I'm back."))
+    await session_cache.flush(entry)
+
+    assert (await InterviewSession.get(sid)).expires_at is None
+
+
+async def test_archived_analyses_stay_in_history_and_dashboard(client, make_user):
+    user, headers = await make_user()
+    old = ResumeAnalysis(user_id=str(user.id), filename="old.pdf",
+                         analysis_data={"analysis": {"score": 55, "identified_domain": "Data Analyst"}},
+                         created_at=datetime.utcnow() - timedelta(days=retention.ARCHIVE_AFTER_DAYS + 1))
+    await old.insert()
+    await ResumeAnalysis(user_id=str(user.id), filename="new.pdf",
+                         analysis_data={"analysis": {"score": 80, "identified_domain": "Data Engineer"}}).insert()
+    before = await client.get("/career/history", headers=headers)
+
+    assert await retention.archive_old_analyses() == 1
+
+    history = await client.get("/career/history", headers=headers)
+    assert history.headers["ETag"] != before.headers["ETag"]
+    assert [(h["filename"], h["score"], h["archived"]) for h in history.json()] == [
+        ("new.pdf", 80, False), ("old.pdf", 55, True)
+    ]
+    assert history.json()[1]["id"] == str(old.id)
+    detail = await client.get(f"/career/analysis/{old.id}", headers=headers)
+    assert detail.json()["analysis"]["score"] == 55
+
+    dashboard = await client.get("/users/me/dashboard", headers=headers)
+    assert [a["filename"] for a in dashboard.json()["analyses"]] == ["new.pdf", "old.pdf"]
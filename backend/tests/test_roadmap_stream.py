@@ -0,0 +1,119 @@
+import json
+from collections import OrderedDict
+
+import pytest
+from langchain_core.runnables import RunnableGenerator
+from langchain_core.utils.json import parse_partial_json
+
+import guidance_agent
+from ai_schema.schema import CareerRoadmap, RoadmapStep
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker
+
+pytestmark = pytest.mark.anyio
+
+ROADMAP = CareerRoadmap(role="Data Engineer", steps=[
+    RoadmapStep(step_title=f"Step {i}: {topic}", description=f"Learn {topic} by building a small project.",
+                estimated_duration=f"{i + 1} weeks")
+    for i, topic in enumerate(["SQL", "Python", "Airflow", "Spark"])
+])
+
+
+class PartialJsonLLM:
+    """
+    Streams ROADMAP the way the structured-output parser does: the JSON text
+    arrives a few characters at a time and each chunk is the partial object
+    parsed so far, half-written strings and steps included.
+    """
+
+    def __init__(self, chunk_chars: int = 9, fail_after: int = None):
+        self.chunk_chars = chunk_chars
+        self.fail_after = fail_after
+        self.sent = 0
+        self.done = False
+
+    def with_structured_output(self, schema):
+        async def stream(_):
+            text = json.dumps(ROADMAP.model_dump())
+            for end in range(self.chunk_chars, len(text) + self.chunk_chars, self.chunk_chars):
+                if self.fail_after is not None and self.sent == self.fail_after:
+                    raise RuntimeError("connection reset")
+                self.sent += 1
+                yield parse_partial_json(text[:end])
+            self.done = True
+        return RunnableGenerator(stream)
+
+
+@pytest.fixture
+def stream_llm(monkeypatch):
+    def install(**kwargs):
+        llm = PartialJsonLLM(**kwargs)
+        monkeypatch.setattr(guidance_agent, "llm", llm)
+        return llm
+
+    breaker = CircuitBreaker("roadmap_stream_test", min_calls=1000)
+    circuit_breaker.breakers.pop(breaker.name)
+    monkeypatch.setattr(guidance_agent, "guidance_breaker", breaker)
+    monkeypatch.setattr(guidance_agent, "_roadmap_cache", OrderedDict())
+    return install
+
+
+async def test_steps_arrive_one_at_a_time_before_the_roadmap(stream_llm):
+    llm = stream_llm()
+    items, sent_at = [], []
+
+    async for item in guidance_agent.stream_roadmap("Data Engineer"):
+        items.append(item)
+        sent_at.append(llm.sent)
+
+    assert items == ROADMAP.steps + [ROADMAP]
+    # Each step but the last goes out on a chunk of its own, while the model is still writing
+    early = sent_at[:len(ROADMAP.steps) - 1]
+    assert early == sorted(set(early))
+    assert early[-1] < sent_at[-1]
+    assert llm.done
+
+
+async def test_no_half_written_step_is_emitted(stream_llm):
+    # One character at a time, so every prefix of every step is seen
+    stream_llm(chunk_chars=1)
+
+    steps = [item async for item in guidance_agent.stream_roadmap("Data Engineer")
+             if isinstance(item, RoadmapStep)]
+
+    assert steps == ROADMAP.steps
+
+
+async def test_failure_after_some_steps_ends_with_the_cached_roadmap(stream_llm):
+    stream_llm()
+    assert [item async for item in guidance_agent.stream_roadmap("Data Engineer")][-1] == ROADMAP
+    cached = guidance_agent.cached_roadmap("Data Engineer")
+
+    llm = stream_llm(fail_after=30)
+    items = [item async for item in guidance_agent.stream_roadmap("Data Engineer")]
+
+    assert 0 < len(items) - 1 < len(ROADMAP.steps)
+    assert items[-1] is cached
+    assert not llm.done
+
+
+def sse_events(body: str):
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+async def test_streamed_roadmap_can_be_saved(client, make_user, stream_llm):
+    stream_llm()
+    _, headers = await make_user()
+
+    response = await client.post("/guidance/generate/stream", json={"job_role": "Data Engineer"}, headers=headers)
+
+    events = list(sse_events(response.text))
+    assert [name for name, _ in events] == ["step"] * len(ROADMAP.steps) + ["roadmap"]
+    assert [data["index"] for _, data in events[:-1]] == list(range(len(ROADMAP.steps)))
+    roadmap = events[-1][1]["roadmap"]
+    saved = await client.post("/guidance/save", json=roadmap, headers=headers)
+    assert saved.status_code == 200
+    active = (await client.get("/guidance/active", headers=headers)).json()
+    assert [step["title"] for step in active["steps"]] == [step.step_title for step in ROADMAP.steps]
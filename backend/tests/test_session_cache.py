@@ -0,0 +1,81 @@
+import anyio
+import pytest
+
+from models import InterviewSession, InterviewMessage
+from session_cache import InterviewSessionCache, session_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def new_session(user_id="u1"):
+    session = InterviewSession(user_id=user_id, job_role="Data Engineer",
+                               messages=[InterviewMessage(sender="ai", content="Hello")])
+    await session.insert()
+    return str(session.id)
+
+
+async def test_idle_sessions_are_evicted_lru_first(db):
+    cache = InterviewSessionCache(max_sessions=1)
+    first, second = await new_session(), await new_session()
+
+    await cache.get(first)
+    await cache.get(second)
+
+    assert cache.peek(first) is None
+    assert cache.stats["evictions"] == 1
+
+
+async def test_pinned_session_is_not_evicted(db):
+    cache = InterviewSessionCache(max_sessions=1)
+    held, other = await new_session(), await new_session()
+
+    entry = await cache.get(held, pin=True)
+    await cache.get(other)
+
+    # An idle connection holds the entry without its lock; a later request must see the same copy
+    assert cache.peek(held) is entry
+    assert await cache.get(held) is entry
+
+    cache.release(entry)
+    await cache.get(other)
+    assert cache.peek(held) is None
+
+
+async def test_pending_messages_are_flushed_on_eviction(db):
+    cache = InterviewSessionCache(max_sessions=1, flush_delay=60)
+    first, second = await new_session(), await new_session()
+
+    entry = await cache.get(first)
+    cache.append(entry, InterviewMessage(sender="user", content="I built pipelines."))
+    await cache.get(second)
+
+    stored = await InterviewSession.get(first)
+    assert [m.content for m in stored.messages] == ["Hello", "I built pipelines."]
+
+
+async def test_turns_within_the_flush_delay_are_written_with_one_push(client, make_user, monkeypatch):
+    monkeypatch.setattr(session_cache, "flush_delay", 0.2)
+    monkeypatch.setattr("routes.career.interview_routes.generate_interview_response",
+                        lambda role, history: f"Question {len(history)}")
+    _, headers = await make_user()
+    sid = (await client.post("/interview/sessions", json={"job_role": "Data Engineer"}, headers=headers)).json()["id"]
+    collection = InterviewSession.get_motor_collection()
+    updates = []
+    update_one = collection.update_one
+
+    async def spy(query, update, *args, **kwargs):
+        updates.append(update)
+        return await update_one(query, update, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "update_one", spy)
+
+    for turn in range(3):
+        response = await client.post(f"/interview/sessions/{sid}/chat", json={"message": f"Answer {turn}"}, headers=headers)
+        assert response.status_code == 200
+    assert updates == []
+
+    await anyio.sleep(0.3)
+    assert len(updates) == 1
+    assert len(updates[0]["$push"]["messages"]["$each"]) == 6
+    stored = await InterviewSession.get(sid)
+    assert len(stored.messages) == 7
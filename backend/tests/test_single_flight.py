@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import routes.career.guidance_routes as guidance_routes
+from ai_schema.schema import CareerRoadmap
+from utils.single_flight import SingleFlight, make_key
+
+pytestmark = pytest.mark.anyio
+
+
+def counting_llm(result=None, delay: float = 0.2):
+    """Stands in for an agent function: counts its calls and stays in flight for a while."""
+    lock = threading.Lock()
+
+    def llm(*args):
+        with lock:
+            llm.calls += 1
+        time.sleep(delay)
+        return result
+
+    llm.calls = 0
+    return llm
+
+
+async def test_100_identical_concurrent_requests_make_one_llm_call(client, make_user, monkeypatch):
+    llm = counting_llm(CareerRoadmap(role="Data Engineer", steps=[]))
+    monkeypatch.setattr(guidance_routes, "generate_roadmap", llm)
+    # Different users, so neither the per-user rate limit nor queue caps apply
+    users = [await make_user(f"user{i}@example.com") for i in range(100)]
+
+    responses = await asyncio.gather(*[
+        client.post("/guidance/generate", json={"job_role": "Data Engineer"}, headers=headers)
+        for _, headers in users
+    ])
+
+    assert [r.status_code for r in responses] == [200] * 100
+    assert all(r.json()["role"] == "Data Engineer" for r in responses)
+    assert llm.calls == 1
+
+
+async def test_coalesces_on_normalized_arguments():
+    flight = SingleFlight()
+    llm = counting_llm("roadmap")
+
+    results = await asyncio.gather(
+        flight.run(llm, "Data Engineer"),
+        flight.run(llm, "  data   engineer "),
+        flight.run(llm, "DATA ENGINEER"),
+    )
+
+    assert results == ["roadmap"] * 3
+    assert llm.calls == 1
+    assert flight.stats[llm.__qualname__] == {"issued": 1, "coalesced": 2}
+
+
+async def test_different_arguments_are_not_coalesced():
+    flight = SingleFlight()
+    llm = counting_llm("roadmap")
+
+    await asyncio.gather(flight.run(llm, "Data Engineer"), flight.run(llm, "Data Analyst"))
+
+    assert llm.calls == 2
+    assert make_key(llm, "Data Engineer") != make_key(llm, "Data Analyst")
+
+
+async def test_nothing_is_cached_after_completion():
+    flight = SingleFlight()
+    llm = counting_llm("roadmap", delay=0)
+
+    await flight.run(llm, "Data Engineer")
+    await flight.run(llm, "Data Engineer")
+
+    assert llm.calls == 2
+
+
+async def test_slot_is_taken_only_by_the_issuing_call():
+    flight = SingleFlight()
+    llm = counting_llm("roadmap")
+    entered = 0
+
+    class Slot:
+        async def __aenter__(self):
+            nonlocal entered
+            entered += 1
+
+        async def __aexit__(self, *exc):
+            return False
+
+    await asyncio.gather(*[flight.run(llm, "Data Engineer", slot=Slot) for _ in range(10)])
+
+    assert entered == 1
+    assert llm.calls == 1
@@ -0,0 +1,164 @@
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+# A breaker opens once this share of the recent calls failed or were slow
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+# Number of recent calls considered, and how many are needed before it can open
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+# Calls slower than this count as failures
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "30"))
+# How long an open breaker rejects calls before letting probes through
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+# Concurrent probe calls allowed while half-open
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Every breaker by name, reported on /health
+breakers: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing model until it recovers. While closed, the outcome
+    of the last CIRCUIT_WINDOW calls is tracked and the breaker opens when the
+    share of errors and slow calls reaches CIRCUIT_FAILURE_RATE. While open,
+    calls fail immediately with CircuitOpen. After CIRCUIT_OPEN_SECONDS it turns
+    half-open and lets a few probe calls through: a successful probe closes
+    it, a failed one opens it again.
+
+    Model calls run both on the event loop and in worker threads, so state is
+    guarded by a lock.
+    """
+
+    def __init__(self, name: str, failure_rate: float = CIRCUIT_FAILURE_RATE, window: int = CIRCUIT_WINDOW,
+                 min_calls: int = CIRCUIT_MIN_CALLS, slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS, half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        # True for each recent call that failed or was slow
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = Counter()
+        breakers[name] = self
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def _acquire(self) -> bool:
+        """Admits a call or raises CircuitOpen. Returns True if the call is a half-open probe."""
+        with self._lock:
+            now = time.monotonic()
+            self._state = self._current_state(now)
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.stats["rejected"] += 1
+            retry_after = self._opened_at + self.open_seconds - now
+            raise CircuitOpen(self.name, max(retry_after, 1.0))
+
+    def _record(self, probe: bool, failed: bool):
+        with self._lock:
+            self.stats["failed" if failed else "succeeded"] += 1
+            if probe:
+                self._probes -= 1
+                if failed:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    print(f"---Circuit '{self.name}' closed---")
+                return
+            # Calls admitted before the breaker opened do not count against it again
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.stats["opened"] += 1
+        print(f"---Circuit '{self.name}' opened---")
+
+    def _release(self, probe: bool):
+        # An abandoned call (cancelled request, closed stream) says nothing about the model
+        if probe:
+            with self._lock:
+                self._probes -= 1
+
+    @contextmanager
+    def guard(self):
+        """
+        Wraps a model call, including a streamed one.
+        Raises:
+            CircuitOpen: If the breaker is open, without running the call.
+        """
+        probe = self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self._record(probe, True)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        self._record(probe, time.monotonic() - started > self.slow_call_seconds)
+
+    def call(self, fn, *args, **kwargs):
+        with self.guard():
+            return fn(*args, **kwargs)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            failures = sum(self._outcomes)
+            return {
+                "state": self._current_state(time.monotonic()),
+                "failure_rate": round(failures / len(self._outcomes), 2) if self._outcomes else 0.0,
+                "recent_calls": len(self._outcomes),
+                **self.stats,
+            }
+
+
+def retry_after_header(exc: CircuitOpen) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+
+
+async def circuit_open_handler(request: Request, exc: CircuitOpen) -> JSONResponse:
+    """Turns a CircuitOpen escaping a route into a fast 503 with Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The AI service is temporarily unavailable. Please retry shortly."},
+        headers=retry_after_header(exc)
+    )
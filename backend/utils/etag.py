@@ -0,0 +1,54 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a weak ETag from document ids, versions and timestamps.
+    Args:
+        *parts: Values identifying the state of the response payload.
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Checks the request's If-None-Match header against an ETag."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def collection_etag(query, *extra) -> str:
+    """
+    Builds an ETag for a list endpoint from a single aggregation over the
+    matching documents (count, version sum and latest update) instead of
+    loading them.
+    Args:
+        query: A Beanie FindMany query.
+        *extra: Additional values mixed into the tag.
+    """
+    summary = await query.aggregate([
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "version": {"$sum": "$version"},
+            "updated_at": {"$max": "$updated_at"},
+            "last_id": {"$max": "$_id"},
+        }}
+    ]).to_list()
+    if not summary:
+        return make_etag("empty", *extra)
+    s = summary[0]
+    return make_etag(s["count"], s["version"], s["updated_at"], s["last_id"], *extra)
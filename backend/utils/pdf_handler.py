@@ -1,5 +1,20 @@
-import PyPDF2
+import io
+import os
 import re
+from abc import ABC, abstractmethod
+
+import PyPDF2
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.layout import LAParams
+except ImportError:
+    pdfminer_extract_text = None
+
+# Extraction backends in the order they are tried, e.g. "pdfminer,pypdf2"
+PDF_BACKENDS = [name.strip() for name in os.getenv("PDF_BACKENDS", "pypdf2,pdfminer").split(",") if name.strip()]
+# A backend yielding fewer non-whitespace characters than this falls back to the next one
+PDF_MIN_TEXT_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", "200"))
 
 def clean_text(text):
     stripped_text = re.sub(r'\s+', ' ', text).strip()
@@ -7,18 +22,81 @@ def clean_text(text):
     stripped_text=  re.sub('●', '', stripped_text)
     return stripped_text
 
+class PdfBackend(ABC):
+    """Extracts the text layer of a PDF given its raw bytes."""
+    name = ""
+
+    def available(self):
+        return True
+
+    @abstractmethod
+    def extract(self, data):
+        pass
+
+
+class PyPDF2Backend(PdfBackend):
+    """Fast, but reads multi-column layouts line by line across columns."""
+    name = "pypdf2"
+
+    def extract(self, data):
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+class PdfMinerBackend(PdfBackend):
+    """Slower, layout-aware: groups text into boxes so columns are kept apart."""
+    name = "pdfminer"
+
+    def available(self):
+        return pdfminer_extract_text is not None
+
+    def extract(self, data):
+        return pdfminer_extract_text(io.BytesIO(data), laparams=LAParams())
+
+
+BACKENDS = {backend.name: backend for backend in (PyPDF2Backend(), PdfMinerBackend())}
+
+
+def _text_chars(text):
+    return len(re.sub(r'\s+', '', text))
+
+
+def extract_text(data, backends=None):
+    """
+    Extracts text with the configured backends, falling back to the next one
+    when a backend fails or yields too little text.
+    Args:
+        data (bytes): The PDF file contents.
+        backends (list): Backend names to try, defaults to PDF_BACKENDS.
+    Returns:
+        (text, backend_name): the best text found and the backend that produced it.
+    """
+    best_text, best_name = "", None
+    for name in backends or PDF_BACKENDS:
+        backend = BACKENDS.get(name)
+        if backend is None or not backend.available():
+            continue
+        try:
+            text = backend.extract(data)
+        except Exception as e:
+            print(f"PDF backend {name} failed: {e}")
+            continue
+        if _text_chars(text) >= PDF_MIN_TEXT_CHARS:
+            return text, name
+        if _text_chars(text) > _text_chars(best_text):
+            best_text, best_name = text, name
+    return best_text, best_name
+
+
 def read_pdf(file_path):
     """
     Reads all text from a PDF file.
     Args:
         file_path (str): The path to the PDF file.
     """
-    text = ""
     try:
         with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text()
+            text, _ = extract_text(file.read())
         return {
             "status": True,
             "text":text
@@ -32,4 +110,4 @@ def read_pdf(file_path):
         return {
             "status": False,
             "text": f"An error occurred: {e}"
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,89 @@
+import io
+import os
+import re
+from collections import Counter
+
+import PyPDF2
+
+from utils.pdf_handler import extract_text
+from utils.resume_sections import match_header
+
+# Limits applied before any LLM call is spent on an upload
+MAX_PAGES = int(os.getenv("PREFLIGHT_MAX_PAGES", "10"))
+MIN_TEXT_CHARS = int(os.getenv("PREFLIGHT_MIN_TEXT_CHARS", "200"))
+MIN_RESUME_SCORE = float(os.getenv("PREFLIGHT_MIN_RESUME_SCORE", "0.3"))
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+PHONE_PATTERN = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+PROFILE_PATTERN = re.compile(r'(linkedin\.com|github\.com|gitlab\.com|behance\.net|portfolio)', re.IGNORECASE)
+
+# Accepted/rejected counts per reason, reported on /health
+stats = Counter()
+
+
+class PreflightError(Exception):
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def resume_score(text):
+    """
+    Scores from 0 to 1 how much the text looks like a resume, from the section
+    headers it contains and the presence of contact details.
+    """
+    headers = {name for name in (match_header(line) for line in text.splitlines()) if name}
+    score = min(len(headers), 4) * 0.15
+    if EMAIL_PATTERN.search(text):
+        score += 0.2
+    if PHONE_PATTERN.search(text):
+        score += 0.1
+    if PROFILE_PATTERN.search(text):
+        score += 0.1
+    return min(score, 1.0)
+
+
+def check_upload(contents):
+    """
+    Validates an uploaded resume locally.
+    Checks magic bytes, page count, size of the text layer and resume-likeness.
+    Args:
+        contents (bytes): The uploaded file.
+    Raises:
+        PreflightError: If the upload should not be sent to the LLM.
+    """
+    stats["checked"] += 1
+    try:
+        _check(contents)
+    except PreflightError as e:
+        stats[f"rejected_{e.reason}"] += 1
+        raise
+    stats["accepted"] += 1
+
+
+def _check(contents):
+    # The PDF header must appear within the first 1024 bytes
+    if b"%PDF-" not in contents[:1024]:
+        raise PreflightError("not_pdf", "The file is not a valid PDF.")
+
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(contents))
+        page_count = len(reader.pages)
+    except Exception:
+        raise PreflightError("unreadable", "The PDF could not be read.")
+
+    if page_count == 0:
+        raise PreflightError("unreadable", "The PDF has no pages.")
+    if page_count > MAX_PAGES:
+        raise PreflightError("too_many_pages", f"Resumes are limited to {MAX_PAGES} pages.")
+
+    # The fast backend is enough to tell whether there is a text layer; the
+    # layout-aware extraction the analysis needs is left to the resume graph
+    text, _ = extract_text(contents, ["pypdf2"])
+
+    if len(re.sub(r'\s+', '', text)) < MIN_TEXT_CHARS:
+        raise PreflightError("no_text", "The PDF has no selectable text. Scanned resumes are not supported.")
+
+    if resume_score(text) < MIN_RESUME_SCORE:
+        raise PreflightError("not_resume", "The document does not look like a resume.")
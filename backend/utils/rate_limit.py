@@ -0,0 +1,188 @@
+import asyncio
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Tuple
+
+from fastapi import Depends, HTTPException
+
+from auth import get_current_user
+from models import User
+
+# Per-endpoint limits as "<requests per minute>/<burst>", overridable with RATE_LIMIT_<ENDPOINT>
+DEFAULT_LIMITS = {
+    "interview_chat": "20/5",
+    "career_analyze": "4/2",
+    "guidance_generate": "10/3",
+    "guidance_details": "30/5",
+    "guidance_quiz": "20/5",
+}
+
+# Concurrent LLM-backed requests per worker, and how many may wait for a slot
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "8"))
+LLM_MAX_QUEUED = int(os.getenv("LLM_MAX_QUEUED", "32"))
+LLM_MAX_QUEUED_PER_USER = int(os.getenv("LLM_MAX_QUEUED_PER_USER", "2"))
+
+
+def _parse_limit(value: str) -> Tuple[float, float]:
+    per_minute, burst = value.split("/")
+    return float(per_minute) / 60.0, float(burst)
+
+
+LIMITS: Dict[str, Tuple[float, float]] = {
+    name: _parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", value))
+    for name, value in DEFAULT_LIMITS.items()
+}
+
+
+def too_many_requests(retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets. The in-memory backend limits per worker; a shared
+    implementation (e.g. Redis) can be plugged in with set_backend() to enforce
+    limits across workers.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        """Takes one token. Returns 0 if allowed, otherwise seconds until a token is available."""
+
+
+class InMemoryBackend(RateLimitBackend):
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            self._prune(now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def _prune(self, now: float):
+        if len(self._buckets) <= self.MAX_BUCKETS:
+            return
+        # Drop buckets idle long enough to have refilled completely
+        for key, (_, last) in list(self._buckets.items()):
+            if now - last > 600:
+                del self._buckets[key]
+
+
+_backend: RateLimitBackend = InMemoryBackend()
+
+
+def set_backend(backend: RateLimitBackend):
+    global _backend
+    _backend = backend
+
+
+async def check_rate_limit(endpoint: str, user_id: str):
+    """Raises 429 with Retry-After if the user is over the endpoint's limit."""
+    rate, capacity = LIMITS[endpoint]
+    retry_after = await _backend.take(f"{endpoint}:{user_id}", rate, capacity)
+    if retry_after:
+        raise too_many_requests(retry_after, "Rate limit exceeded. Please slow down.")
+
+
+def rate_limit(endpoint: str):
+    """Dependency that authenticates the user and applies the endpoint's token bucket."""
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+        await check_rate_limit(endpoint, str(current_user.id))
+        return current_user
+    return dependency
+
+
+class FairScheduler:
+    """
+    Admits LLM-backed work up to a concurrency limit and queues the rest per user.
+    Freed slots are handed out round-robin across users, so one user's backlog
+    cannot starve others. When the queue is full the request is shed with 429
+    before any work is queued.
+    """
+
+    def __init__(self, max_concurrent: int = LLM_MAX_CONCURRENT, max_queued: int = LLM_MAX_QUEUED,
+                 max_queued_per_user: int = LLM_MAX_QUEUED_PER_USER):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self._active = 0
+        self._queued = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # Moving average of slot hold time, used to estimate Retry-After
+        self._avg_duration = 5.0
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0}
+
+    def _retry_after(self) -> float:
+        return self._avg_duration * (self._queued + 1) / self.max_concurrent
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        if self._active < self.max_concurrent and not self._queued:
+            self._active += 1
+        else:
+            user_waiters = self._waiters.get(user_id)
+            if self._queued >= self.max_queued or (user_waiters and len(user_waiters) >= self.max_queued_per_user):
+                self.stats["shed"] += 1
+                raise too_many_requests(self._retry_after(), "Server is busy. Please retry shortly.")
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(user_id, deque()).append(future)
+            self._queued += 1
+            self.stats["queued"] += 1
+            try:
+                # The releasing request hands its slot over by resolving the future
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                else:
+                    self._remove_waiter(user_id, future)
+                raise
+
+        self.stats["admitted"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    def _remove_waiter(self, user_id: str, future: asyncio.Future):
+        user_waiters = self._waiters.get(user_id)
+        if user_waiters and future in user_waiters:
+            user_waiters.remove(future)
+            self._queued -= 1
+            if not user_waiters:
+                del self._waiters[user_id]
+
+    def _release(self):
+        while self._waiters:
+            user_id, user_waiters = next(iter(self._waiters.items()))
+            future = user_waiters.popleft()
+            self._queued -= 1
+            # Rotate the user to the back so the next slot goes to someone else
+            del self._waiters[user_id]
+            if user_waiters:
+                self._waiters[user_id] = user_waiters
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+llm_scheduler = FairScheduler()
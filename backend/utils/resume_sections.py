@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+
+from utils.pdf_handler import clean_text
+
+# Canonical section names and the headers that introduce them
+SECTION_HEADERS = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship"],
+    "education": ["education", "academic background", "academics", "qualifications",
+                  "educational qualifications"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "technologies",
+               "tools", "skills and tools"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "courses"],
+    "achievements": ["achievements", "awards", "honors", "honours", "accomplishments"],
+    "activities": ["activities", "extracurricular activities", "volunteering", "volunteer experience",
+                   "leadership"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies"],
+    "references": ["references"],
+    "declaration": ["declaration"],
+}
+
+# Per-section token budget applied before text is sent to the LLM
+SECTION_TOKEN_BUDGET = int(os.getenv("RESUME_SECTION_TOKEN_BUDGET", "600"))
+
+# Sections that carry nothing useful for skill extraction or scoring
+DROPPED_SECTIONS = {
+    name.strip() for name in os.getenv("RESUME_DROPPED_SECTIONS", "references,declaration").split(",") if name.strip()
+}
+
+# Lines that are repeated page furniture or filler. Bare page numbers are at
+# most three digits, so years and phone numbers on a line of their own stay.
+BOILERPLATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r'^(curriculum vitae|resume|r[eé]sum[eé]|cv)$',
+    r'^page \d+( of \d+)?$',
+    r'^\d{1,3}$',
+    r'references? (are )?(available )?(up)?on request',
+    r'^i hereby declare',
+    r'^(place|date)\s*:',
+]]
+
+# Lines shorter than this are not deduplicated (e.g. a repeated year or skill)
+MIN_DEDUP_LENGTH = 15
+
+# Text before the first recognised header (name, contact details)
+HEADER_SECTION = "header"
+
+_HEADER_LOOKUP = {
+    alias: name for name, aliases in SECTION_HEADERS.items() for alias in aliases
+}
+
+
+def match_header(line):
+    """Returns the canonical section name if the line is a section header."""
+    candidate = re.sub(r'[^a-z& ]', '', line.lower()).replace("&", "and").strip()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADER_LOOKUP.get(re.sub(r'\s+', ' ', candidate))
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), no tokenizer needed."""
+    return (len(text) + 3) // 4
+
+
+def _is_boilerplate(line):
+    return any(pattern.search(line) for pattern in BOILERPLATE_PATTERNS)
+
+
+def _trim_to_budget(text, token_budget):
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+    cut = text[:token_budget * 4]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+
+def split_sections(text, token_budget=None):
+    """
+    Splits raw resume text into sections keyed by canonical section name.
+    Boilerplate and repeated lines (page headers/footers) are dropped, as are
+    sections listed in DROPPED_SECTIONS.
+    Args:
+        text (str): Raw text as extracted from the PDF, with line breaks intact.
+        token_budget (int): Optional per-section token budget; longer sections are truncated.
+    """
+    sections = {}
+    seen = set()
+    current = HEADER_SECTION
+    for line in text.splitlines():
+        name = match_header(line)
+        if name:
+            current = name
+            sections.setdefault(current, [])
+            continue
+        normalized = clean_text(line).lower()
+        if not normalized or _is_boilerplate(normalized):
+            continue
+        if len(normalized) >= MIN_DEDUP_LENGTH:
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+        sections.setdefault(current, []).append(line)
+
+    result = {}
+    for name, lines in sections.items():
+        if name in DROPPED_SECTIONS:
+            continue
+        body = _trim_to_budget(clean_text("\n".join(lines)), token_budget)
+        if body:
+            result[name] = body
+    return result
+
+
+def compact_resume(text, token_budget=SECTION_TOKEN_BUDGET):
+    """
+    Builds the compacted, section-aware view of a resume that is sent to the LLM.
+    Args:
+        text (str): Raw text as extracted from the PDF.
+        token_budget (int): Per-section token budget.
+    Returns:
+        (sections, prompt_text): compacted sections and their labelled concatenation.
+    """
+    sections = split_sections(text, token_budget)
+    prompt_text = "\n".join(f"{name.upper()}: {body}" for name, body in sections.items())
+    return sections, prompt_text
+
+
+def section_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def diff_sections(sections, previous):
+    """
+    Compares sections against a previous version of the resume.
+    Args:
+        sections (dict): Section name -> cleaned text of the new upload.
+        previous (dict): Section name -> {"hash": ..., "extraction": ...} from the last analysis.
+    Returns:
+        (changed, unchanged): names of sections needing extraction, and names whose
+        stored extraction can be reused.
+    """
+    changed, unchanged = [], []
+    for name, body in sections.items():
+        prev = (previous or {}).get(name)
+        if prev and prev.get("extraction") is not None and prev.get("hash") == section_hash(body):
+            unchanged.append(name)
+        else:
+            changed.append(name)
+    return changed, unchanged
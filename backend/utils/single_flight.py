@@ -0,0 +1,57 @@
+import asyncio
+import re
+from collections import defaultdict
+from typing import Any, AsyncContextManager, Callable, Dict, Optional, Tuple
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip().lower()
+    return value
+
+
+def make_key(fn: Callable, *args) -> Tuple:
+    """Key identifying a call: the function plus its normalized arguments."""
+    return (fn.__module__, fn.__qualname__) + tuple(_normalize(a) for a in args)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls to blocking functions (LLM calls).
+
+    The first caller for a key starts the call in a worker thread; callers that
+    arrive while it is in flight await the same result instead of issuing their
+    own. Nothing is cached once the call completes.
+
+    Admission (e.g. a scheduler slot) is passed as ``slot`` and only taken by the
+    caller that issues the call, so callers sharing it never hold or queue for a
+    slot. If the issuing call is shed, every caller sharing it gets the error.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"issued": 0, "coalesced": 0})
+
+    async def run(self, fn: Callable, *args, slot: Optional[Callable[[], AsyncContextManager]] = None) -> Any:
+        key = make_key(fn, *args)
+        counters = self.stats[fn.__qualname__]
+        task = self._inflight.get(key)
+        if task is not None:
+            counters["coalesced"] += 1
+        else:
+            counters["issued"] += 1
+            task = asyncio.ensure_future(self._call(fn, args, slot))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _call(fn: Callable, args: Tuple, slot: Optional[Callable[[], AsyncContextManager]]) -> Any:
+        if slot is None:
+            return await asyncio.to_thread(fn, *args)
+        async with slot():
+            return await asyncio.to_thread(fn, *args)
+
+
+single_flight = SingleFlight()